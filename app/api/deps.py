@@ -1,4 +1,5 @@
 # app/api/deps.py
+import uuid
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials # <--- Use HTTPBearer
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -6,11 +7,33 @@ from jose import jwt, JWTError
 
 from app.database import get_db
 from app.config import get_settings
+from app.core.cache import TTLCache
+from app.core.revocation import revocation_list
 from app.models.user import User, UserRole
 
 # HTTPBearer creates the simple "Bearer Token" form in Swagger UI
 security = HTTPBearer()
 
+# --- Authenticated User Cache ---
+# Resolved identities keyed by user id, so repeat requests skip the users lookup.
+# We store a plain snapshot of the columns (not the ORM object) and build a fresh,
+# session-less User per request, so nothing leaks between requests.
+# Invalidate via invalidate_cached_user() whenever role / is_active changes; every
+# such change also bumps token_version. That only clears this worker's cache, so a
+# cached snapshot is also checked against the revocation list, which every worker
+# re-syncs from the DB: other workers drop a demoted / deactivated user within
+# AUTH_REVOCATION_REFRESH_SECONDS (and never later than USER_CACHE_TTL_SECONDS).
+user_cache = TTLCache(
+    max_size=get_settings().USER_CACHE_MAX_SIZE,
+    ttl_seconds=get_settings().USER_CACHE_TTL_SECONDS,
+)
+
+# No hashed_password: auth never needs it, and it shouldn't sit in a long-lived cache
+_USER_CACHE_FIELDS = ("id", "email", "username", "is_active", "role", "token_version")
+
+def invalidate_cached_user(user_id) -> None:
+    user_cache.invalidate(str(user_id))
+
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security), # <--- Updated signature
     db: AsyncSession = Depends(get_db)
@@ -29,16 +52,46 @@ async def get_current_user(
         user_id: str = payload.get("sub")
         if user_id is None:
             raise credentials_exception
-    except JWTError:
+        user_id = str(uuid.UUID(user_id)) # Normalize so cache keys are consistent
+    except (JWTError, ValueError):
         raise credentials_exception
     
-    # DB Lookup
-    from sqlalchemy import select
-    result = await db.execute(select(User).filter(User.id == user_id))
-    user = result.scalar_one_or_none()
+    # 0. Stateless-claims mode: authorize from the token alone (no DB, no cache)
+    if get_settings().AUTH_STATELESS_TOKENS and "ver" in payload:
+        try:
+            token_version = int(payload["ver"])
+            role = UserRole(payload["role"])
+        except (KeyError, TypeError, ValueError):
+            raise credentials_exception
+        if revocation_list.is_revoked(user_id, token_version):
+            raise credentials_exception
+        if not payload.get("active", False):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Inactive user")
+        # Only id / role / is_active are populated here; handlers needing
+        # email or username must load the user themselves.
+        return User(id=uuid.UUID(user_id), role=role, is_active=True, token_version=token_version)
+    
+    # 1. Cache Lookup
+    snapshot = user_cache.get(user_id)
+    if snapshot is not None and revocation_list.is_revoked(user_id, snapshot["token_version"]):
+        # Changed on another worker since we cached it: reload
+        user_cache.invalidate(user_id)
+        snapshot = None
+    if snapshot is not None:
+        user = User(**snapshot)
+    else:
+        # 2. DB Lookup (cache miss)
+        from sqlalchemy import select
+        result = await db.execute(select(User).filter(User.id == user_id))
+        user = result.scalar_one_or_none()
+        
+        if user is None:
+            raise credentials_exception
+        
+        user_cache.set(user_id, {field: getattr(user, field) for field in _USER_CACHE_FIELDS})
     
-    if user is None:
-        raise credentials_exception
+    if not user.is_active:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Inactive user")
     return user
 
 async def get_current_admin(current_user: User = Depends(get_current_user)) -> User:
@@ -47,4 +100,4 @@ async def get_current_admin(current_user: User = Depends(get_current_user)) -> U
             status_code=status.HTTP_403_FORBIDDEN,
             detail="The user doesn't have enough privileges"
         )
-    return current_user
\ No newline at end of file
+    return current_user
@@ -0,0 +1,26 @@
+# app/api/v1/endpoints/admin.py
+from fastapi import APIRouter, Depends
+
+from app.api.deps import get_current_admin, user_cache
+from app.database import pool_stats, replica_pool_stats, replica_monitor
+from app.models.user import User
+
+router = APIRouter()
+
+@router.get("/stats/user-cache")
+async def user_cache_stats(current_admin: User = Depends(get_current_admin)):
+    """
+    Hit/miss counters for the authenticated-user cache (this worker only).
+    """
+    return user_cache.stats()
+
+@router.get("/stats/db-pool")
+async def db_pool_stats(current_admin: User = Depends(get_current_admin)):
+    """
+    Live connection pool usage plus pool wait times and slow query count (this worker only).
+    """
+    return {
+        "primary": pool_stats.snapshot(),
+        "replica": replica_pool_stats.snapshot() if replica_pool_stats else None,
+        "replica_health": replica_monitor.snapshot() if replica_pool_stats else None,
+    }
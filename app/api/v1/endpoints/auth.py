@@ -2,9 +2,10 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
+from app.config import get_settings
 from app.schemas.user import UserCreate, UserResponse, UserLogin, Token
 from app.models.user import User, UserRole # <--- Import UserRole
-from app.core.security import verify_password, get_password_hash, create_access_token
+from app.core.security import verify_password_async, get_password_hash_async, create_access_token
 from sqlalchemy import select
 from datetime import timedelta # <--- Import timedelta
 
@@ -19,7 +20,7 @@ async def register(user_in: UserCreate, db: AsyncSession = Depends(get_db)):
     user = User(
         email=user_in.email,
         username=user_in.username,
-        hashed_password=get_password_hash(user_in.password),
+        hashed_password=await get_password_hash_async(user_in.password),
         role=user_in.role
     )
     db.add(user)
@@ -32,7 +33,7 @@ async def login(user_in: UserLogin, db: AsyncSession = Depends(get_db)):
     result = await db.execute(select(User).filter(User.username == user_in.username))
     user = result.scalar_one_or_none()
     
-    if not user or not verify_password(user_in.password, user.hashed_password):
+    if not user or not await verify_password_async(user_in.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -46,9 +47,15 @@ async def login(user_in: UserLogin, db: AsyncSession = Depends(get_db)):
     else:
         access_token_expires = timedelta(days=7) # Users get 7 days
 
+    # Stateless-claims mode: embed what get_current_user needs to skip the DB
+    claims = None
+    if get_settings().AUTH_STATELESS_TOKENS:
+        claims = {"role": user.role.value, "active": user.is_active, "ver": user.token_version}
+
     access_token = create_access_token(
         subject=str(user.id), 
-        expires_delta=access_token_expires
+        expires_delta=access_token_expires,
+        claims=claims
     )
     # --- END OF CHANGES ---
     
@@ -1,94 +1,137 @@
 # app/api/v1/endpoints/carts.py
 from fastapi import APIRouter, Depends, HTTPException, status
+from decimal import Decimal
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from sqlalchemy.orm.attributes import flag_modified  # CRITICAL: To save JSONB changes
-from app.database import get_db
-from app.models.cart import Cart 
+from app.database import get_db, get_read_db
 from app.models.product import ProductVariant
-from app.schemas.order import CartItem, CartResponse
+from app.schemas.order import CartItem, CartResponse, CartOperation, CartBatchRequest, CartPreviewLine, CartPreviewResponse
 from app.models.user import User
 from app.api.deps import get_current_user
+from app.core.cart_store import cart_store, as_lines # SQL or Redis, see CART_BACKEND
+from app.core.cache import TTLCache
+from app.core.pricing import get_valid_coupon, apply_discount
+from app.config import get_settings
+from typing import List, Optional
 from uuid import UUID
 
 router = APIRouter()
+settings = get_settings()
+
+# variant_id -> (product_id, sku, price, inventory_count) for cart previews.
+# Short TTL: prices/stock shown may lag by a few seconds; checkout re-reads them under lock.
+variant_price_cache = TTLCache(max_size=settings.CART_PRICE_CACHE_MAX_SIZE, ttl_seconds=settings.CART_PRICE_CACHE_TTL_SECONDS)
+
+async def _check_variants_exist(db: AsyncSession, operations: List[CartOperation]) -> None:
+    """One IN query for every variant the operations would put in the cart."""
+    wanted = {o.variant_id for o in operations if o.op != "remove" and o.quantity}
+    if not wanted:
+        return
+    result = await db.execute(select(ProductVariant.id).filter(ProductVariant.id.in_(wanted)))
+    missing = wanted - set(result.scalars().all())
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Variant not found: {', '.join(sorted(map(str, missing)))}")
 
 @router.get("/", response_model=CartResponse)
-async def get_cart(session_id: str, db: AsyncSession = Depends(get_db)):
+async def get_cart(session_id: str, db: AsyncSession = Depends(get_read_db)):
     """
     Retrieve cart items for a given session_id.
     """
-    result = await db.execute(select(Cart).filter(Cart.session_id == session_id))
-    cart = result.scalar_one_or_none()
+    items = await cart_store.get_items(db, session_id)
+    return CartResponse(session_id=session_id, items=as_lines(items or {}))
+
+@router.get("/preview", response_model=CartPreviewResponse)
+async def preview_cart(session_id: str, coupon_code: Optional[str] = None, db: AsyncSession = Depends(get_read_db)):
+    """
+    Cart with prices: line totals, subtotal, coupon discount and total, computed the same
+    way checkout does. Lines checkout would reject (gone, not enough stock) carry a warning
+    and are left out of the totals. Read-only: takes no locks and doesn't use the coupon.
+    """
+    items = await cart_store.get_items(db, session_id) or {}
     
-    if not cart:
-        return CartResponse(session_id=session_id, items=[])
+    # 1. Resolve variants: cached ones from memory, the rest in a single IN query
+    variants = {}
+    missing = []
+    for variant_id in items:
+        cached = variant_price_cache.get(variant_id)
+        if cached is None:
+            missing.append(UUID(variant_id))
+        else:
+            variants[variant_id] = cached
+    if missing:
+        result = await db.execute(
+            select(ProductVariant.id, ProductVariant.product_id, ProductVariant.sku, ProductVariant.price, ProductVariant.inventory_count)
+            .filter(ProductVariant.id.in_(missing))
+        )
+        for row in result.all():
+            variants[str(row.id)] = (row.product_id, row.sku, row.price, row.inventory_count)
+            variant_price_cache.set(str(row.id), variants[str(row.id)])
     
-    return CartResponse(session_id=cart.session_id, items=cart.items)
+    # 2. Price the lines (same Decimal math as checkout)
+    lines = []
+    subtotal = Decimal("0.00")
+    for variant_id, qty in items.items():
+        if variant_id not in variants:
+            lines.append(CartPreviewLine(variant_id=variant_id, quantity=qty, line_total=Decimal("0.00"), available=0, warning="Variant no longer available"))
+            continue
+        product_id, sku, price, available = variants[variant_id]
+        line = CartPreviewLine(
+            variant_id=variant_id, product_id=product_id, sku=sku, quantity=qty,
+            unit_price=price, line_total=price * qty, available=available
+        )
+        if available < qty:
+            line.warning = f"Insufficient stock. Available: {available}, Requested: {qty}"
+            line.line_total = Decimal("0.00")
+        else:
+            subtotal += line.line_total
+        lines.append(line)
+    
+    # 3. Coupon: an unusable code is reported, not fatal, so the rest of the preview still shows
+    coupon = None
+    coupon_error = None
+    if coupon_code:
+        try:
+            coupon = await get_valid_coupon(db, coupon_code)
+        except HTTPException as e:
+            coupon_error = e.detail
+    discount, total = apply_discount(subtotal, coupon)
+    
+    return CartPreviewResponse(
+        session_id=session_id,
+        lines=lines,
+        subtotal=subtotal,
+        discount=discount,
+        total=total,
+        coupon_code=coupon.code if coupon else None,
+        coupon_error=coupon_error,
+        can_checkout=bool(lines) and not any(line.warning for line in lines) and coupon_error is None
+    )
 
 @router.post("/add")
 async def add_to_cart(item: CartItem, session_id: str, db: AsyncSession = Depends(get_db)):
     """
     Add or update an item in cart.
     """
-    # 1. Get Cart
-    result = await db.execute(select(Cart).filter(Cart.session_id == session_id))
-    cart = result.scalar_one_or_none()
-    
-    # 2. If cart doesn't exist, create it
-    if not cart:
-        cart = Cart(session_id=session_id, items=[])
-        db.add(cart)
-        await db.flush() # Flush to assign an ID before we work on the object
-    
-    # 3. Validate Variant exists (Optional, but good for error handling)
-    v_result = await db.execute(select(ProductVariant).filter(ProductVariant.id == item.variant_id))
-    if not v_result.scalar_one_or_none():
-        raise HTTPException(status_code=404, detail="Variant not found")
-        
-    # 4. Logic: Update quantity if item exists, else append new item
-    # 'items' is a Python list of dicts
-    current_items = cart.items
-    
-    # Safety check if items is None (unlikely but possible)
-    if current_items is None:
-        current_items = []
-        
-    found = False
-    for i in current_items:
-        # Ensure we compare UUIDs correctly (convert JSON string back to UUID for comparison)
-        if UUID(i["variant_id"]) == item.variant_id:
-            i["quantity"] += item.quantity
-            found = True
-            break
-            
-    if not found:
-        current_items.append({
-            "variant_id": str(item.variant_id),
-            "quantity": item.quantity
-        })
-    
-    # 5. Save Changes
-    # First, re-assign list to model
-    cart.items = current_items
-    
-    # Second, TELL SQLAlchemy to update this specific column (Fixes "Empty Cart" issue)
-    flag_modified(cart, "items")
-    
-    await db.commit()
-    return {"message": "Item added", "items": cart.items}
+    operations = [CartOperation(op="add", variant_id=item.variant_id, quantity=item.quantity)]
+    await _check_variants_exist(db, operations)
+    items = await cart_store.apply(db, session_id, operations)
+    return {"message": "Item added", "items": as_lines(items)}
+
+@router.post("/batch")
+async def update_cart_batch(batch: CartBatchRequest, session_id: str, db: AsyncSession = Depends(get_db)):
+    """
+    Apply several cart changes at once (e.g. reorder, add a bundle), in order and atomically:
+    {"op": "add", "variant_id": ..., "quantity": 2}, {"op": "set", ..., "quantity": 1},
+    {"op": "remove", "variant_id": ...}. Nothing is applied if any variant doesn't exist.
+    """
+    await _check_variants_exist(db, batch.operations)
+    items = await cart_store.apply(db, session_id, batch.operations)
+    return {"message": "Cart updated", "items": as_lines(items)}
 
 @router.delete("/")
 async def clear_cart(session_id: str, db: AsyncSession = Depends(get_db)):
     """
     Clear all items in cart.
     """
-    result = await db.execute(select(Cart).filter(Cart.session_id == session_id))
-    cart = result.scalar_one_or_none()
-    
-    if cart:
-        cart.items = []
-        flag_modified(cart, "items") # Ensure this triggers update
-        await db.commit()
-        
-    return {"message": "Cart cleared"}
\ No newline at end of file
+    await cart_store.clear(db, session_id)
+    return {"message": "Cart cleared"}
@@ -1,20 +1,32 @@
 # app/api/v1/endpoints/orders.py
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, tuple_
 from sqlalchemy.orm import selectinload
 from decimal import Decimal
+from datetime import datetime
+from typing import Optional
+import csv
+import io
+import json
 import uuid
 
-from app.database import get_db
+from app.config import get_settings
+from app.database import get_db, read_session_factory
 from app.models.order import Order, OrderItem, OrderStatus
 from app.models.product import ProductVariant
-from app.models.cart import Cart
-from app.models.coupon import Coupon, DiscountType # <--- NEW IMPORT
 from app.schemas.order import CheckoutRequest, OrderResponse, OrderItemResponse
 from app.api.deps import get_current_user, get_current_admin
 from app.models.user import User
-from sqlalchemy.orm.attributes import flag_modified
+from app.core.pagination import encode_cursor, decode_cursor, NEXT_CURSOR_HEADER
+from app.core.catalog_cache import catalog_cache
+from app.core.inventory import adjust_total_inventory, reserve_stock
+from app.core.cart_store import cart_store
+from app.core.pricing import get_valid_coupon, apply_discount
+from app.core.trending import trending
+from app.core.fast_json import order_rows_statement, orders_json
+from app.core.etag import make_etag, etag_matches, not_modified, order_versions
 
 router = APIRouter()
 
@@ -27,104 +39,75 @@ async def checkout(
     """
     1. Get Cart
     2. Validate Coupon (If provided)
-    3. Validate Inventory (Lock Rows)
+    3. Reserve Inventory (one conditional UPDATE, rows locked in id order)
     4. Calculate Total
     5. Apply Discount
-    6. Create Order
-    7. Deduct Inventory & Update Coupon Usage
-    8. Clear Cart
+    6. Create Order & Update Coupon Usage
+    7. Clear Cart
     """
     
     # 1. Retrieve Cart
-    cart_result = await db.execute(select(Cart).filter(Cart.session_id == request.session_id))
-    cart = cart_result.scalar_one_or_none()
+    items_data = await cart_store.get_items(db, request.session_id) # {variant_id: quantity}
     
-    if not cart:
+    if items_data is None:
         raise HTTPException(status_code=404, detail="Cart is empty or not found")
-        
-    items_data = cart.items # List of dicts
     
     if not items_data:
         raise HTTPException(status_code=400, detail="Cart is empty")
     
     # --- NEW: DISCOUNT LOGIC START ---
     coupon = None
-    discount_amount = Decimal("0.00")
     
     if request.coupon_code:
-        coupon_code = request.coupon_code.upper()
-        c_result = await db.execute(select(Coupon).filter(Coupon.code == coupon_code))
-        coupon = c_result.scalar_one_or_none()
-        
-        if not coupon:
-            raise HTTPException(status_code=404, detail="Invalid coupon code")
-            
-        if not coupon.is_active:
-            raise HTTPException(status_code=400, detail="Coupon is inactive")
-            
-        if coupon.max_uses and coupon.usage_count >= coupon.max_uses:
-            raise HTTPException(status_code=400, detail="Coupon usage limit reached")
+        coupon = await get_valid_coupon(db, request.coupon_code)
             
     # We will calculate the specific amount after we get the raw total
     # --- DISCOUNT LOGIC PREP END ---
         
-    # 2. Start Transaction & Lock Inventory
-    variant_ids = [uuid.UUID(item["variant_id"]) for item in items_data]
+    # 2. Reserve Inventory
+    # Check and decrement in a single statement (app/core/inventory.py): concurrent
+    # checkouts sharing SKUs queue on the row locks in the same order instead of
+    # deadlocking, and stock never goes below zero.
+    quantities = {uuid.UUID(variant_id): qty for variant_id, qty in items_data.items()}
+    reserved = await reserve_stock(db, quantities)
     
-    # Query variants WITH lock
-    stmt = select(ProductVariant).filter(
-        ProductVariant.id.in_(variant_ids)
-    ).with_for_update()
-    
-    result = await db.execute(stmt)
-    variants = result.scalars().all()
-    
-    # Map to dict
-    variant_map = {v.id: v for v in variants}
+    if len(reserved) < len(quantities):
+        # Undo the partial reservation and report the first line that couldn't be covered
+        await db.rollback()
+        missing = [v_id for v_id in quantities if v_id not in reserved]
+        result = await db.execute(
+            select(ProductVariant.id, ProductVariant.sku, ProductVariant.inventory_count)
+            .filter(ProductVariant.id.in_(missing))
+        )
+        current = {row.id: row for row in result.all()}
+        v_id = missing[0]
+        if v_id not in current:
+            raise HTTPException(status_code=400, detail=f"Variant {v_id} not found")
+        raise HTTPException(
+            status_code=400, 
+            detail=f"Insufficient stock for SKU {current[v_id].sku}. Available: {current[v_id].inventory_count}, Requested: {quantities[v_id]}"
+        )
     
     order_items_to_create = []
     total_amount = Decimal("0.00")
+    inventory_deltas = {}
     
-    # 3. Validate and Calculate Raw Total
-    for item in items_data:
-        v_id = uuid.UUID(item["variant_id"])
-        qty = item["quantity"]
-        
-        if v_id not in variant_map:
-            raise HTTPException(status_code=400, detail=f"Variant {v_id} not found")
-            
-        variant = variant_map[v_id]
-        
-        if variant.inventory_count < qty:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Insufficient stock for SKU {variant.sku}. Available: {variant.inventory_count}, Requested: {qty}"
-            )
-            
-        line_total = variant.price * qty
-        total_amount += line_total
+    # 3. Calculate Raw Total
+    for v_id, qty in quantities.items():
+        variant = reserved[v_id]
+        total_amount += variant.price * qty
         
         order_items_to_create.append(OrderItem(
             variant_id=v_id,
             quantity=qty,
             unit_price=variant.price
         ))
+        inventory_deltas[variant.product_id] = inventory_deltas.get(variant.product_id, 0) - qty
     
     # --- NEW: APPLY DISCOUNT START ---
+    # Same math as the cart preview (app/core/pricing.py)
+    discount_amount, total_amount = apply_discount(total_amount, coupon)
     if coupon:
-        if coupon.discount_type == DiscountType.PERCENTAGE:
-            # Calculate percentage
-            discount_amount = total_amount * (coupon.value / Decimal("100"))
-        else:
-            # Fixed amount
-            discount_amount = coupon.value
-        
-        total_amount -= discount_amount
-        
-        # Ensure total doesn't go negative (unless we want free items, which is fine)
-        if total_amount < 0:
-            total_amount = Decimal("0.00")
-            
         # Increment usage count immediately
         coupon.usage_count += 1
     # --- APPLY DISCOUNT END ---
@@ -140,23 +123,25 @@ async def checkout(
     
     db.add(order)
     
-    # 5. Update Inventory (Commit happens here)
-    for item in items_data:
-        v_id = uuid.UUID(item["variant_id"])
-        variant_map[v_id].inventory_count -= item["quantity"]
-        
-        # Optional: Broadcast real-time update
-        try:
-            from app.api.v1.endpoints.websocket import manager
-            await manager.broadcast(str(variant_map[v_id].product_id), {
+    # 5. Keep the denormalized product totals in step (same transaction), then commit
+    await adjust_total_inventory(db, inventory_deltas)
+    await db.commit()
+    await catalog_cache.bump() # Stock levels in cached catalog pages are now stale
+    await order_versions.bump(current_user.id)
+    trending.record((product_id, -delta) for product_id, delta in inventory_deltas.items()) # Units sold per product
+    
+    # Optional: Broadcast real-time update (after commit, so listeners never see
+    # stock that gets rolled back)
+    try:
+        from app.api.v1.endpoints.websocket import manager
+        for v_id, variant in reserved.items():
+            await manager.broadcast(str(variant.product_id), {
                 "event": "stock_update",
                 "variant_id": str(v_id),
-                "new_stock": variant_map[v_id].inventory_count
+                "new_stock": variant.new_stock
             })
-        except ImportError:
-            pass
-
-    await db.commit()
+    except ImportError:
+        pass
     
     # 6. REFRESH FIX (MissingGreenlet Error)
     result = await db.execute(
@@ -167,34 +152,174 @@ async def checkout(
     order = result.scalar_one()
     
     # 7. Clear Cart
-    cart.items = []
-    flag_modified(cart, "items") 
-    await db.commit()
+    await cart_store.clear(db, request.session_id)
     
     return order
 
+def orders_page_statement(stmt, cursor: Optional[str], limit: int):
+    """One page of order_rows_statement(), newest first (keyset on (created_at, id))."""
+    stmt = (
+        stmt.order_by(Order.created_at.desc(), Order.id.desc())
+        .limit(limit + 1) # One extra row tells us whether there is a next page
+    )
+    if cursor:
+        last_created_at, last_id = decode_cursor(cursor, datetime.fromisoformat, uuid.UUID)
+        stmt = stmt.filter(tuple_(Order.created_at, Order.id) < tuple_(last_created_at, last_id))
+    return stmt
+
+async def _paginate_orders(stmt, cursor: Optional[str], limit: int, db: AsyncSession, headers: Optional[dict] = None) -> Response:
+    """
+    Newest first, keyset on (created_at, id). stmt comes from order_rows_statement():
+    items are aggregated in SQL for the page rows only, and the page is encoded
+    straight from the rows (fast path, no ORM objects).
+    """
+    headers = dict(headers or {})
+    result = await db.execute(orders_page_statement(stmt, cursor, limit))
+    orders = result.all()
+    
+    if len(orders) > limit:
+        orders = orders[:limit]
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(orders[-1].created_at.isoformat(), orders[-1].id)
+    return Response(content=orders_json(orders), media_type="application/json", headers=headers)
+
 @router.get("/", response_model=list[OrderResponse])
 async def list_my_orders(
-    db: AsyncSession = Depends(get_db),
+    request: Request,
+    cursor: Optional[str] = Query(None, description="Opaque token from the X-Next-Cursor header of the previous page"),
+    limit: int = Query(20, ge=1, le=get_settings().MAX_PAGE_SIZE),
     current_user: User = Depends(get_current_user)
 ):
-    result = await db.execute(
-        select(Order)
-        .options(selectinload(Order.items))
-        .filter(Order.user_id == current_user.id)
-        .order_by(Order.created_at.desc())
-    )
-    return result.scalars().all()
+    # Conditional GET: the user's order version changes whenever any of their orders does
+    version, bumped_at = await order_versions.get(current_user.id)
+    etag = make_etag("o", version, (current_user.id, cursor, limit))
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(etag)
+    
+    # Read from the replica only once it can have replayed the user's last order change,
+    # otherwise a fresh order could be missing from a page ETagged with the new version
+    session_factory = await read_session_factory(written_at=bumped_at)
+    async with session_factory() as db:
+        # Backed by ix_orders_user_id_created_at_id
+        stmt = order_rows_statement().filter(Order.user_id == current_user.id)
+        return await _paginate_orders(stmt, cursor, limit, db, headers={"ETag": etag})
 
 # Simple Admin view for all orders
 @router.get("/admin/all", response_model=list[OrderResponse])
 async def list_all_orders(
+    cursor: Optional[str] = Query(None, description="Opaque token from the X-Next-Cursor header of the previous page"),
+    limit: int = Query(50, ge=1, le=get_settings().MAX_PAGE_SIZE),
     db: AsyncSession = Depends(get_db),
     current_admin: User = Depends(get_current_admin)
 ):
-    result = await db.execute(
-        select(Order)
-        .options(selectinload(Order.items))
-        .order_by(Order.created_at.desc())
+    # Backed by ix_orders_created_at_id
+    return await _paginate_orders(order_rows_statement(), cursor, limit, db)
+
+# --- Admin Export (streamed) ---
+EXPORT_BATCH_SIZE = 1000 # Rows fetched per round trip from the server-side cursor
+
+EXPORT_CSV_COLUMNS = [
+    "order_id", "user_id", "status", "total_amount", "shipping_address", "created_at",
+    "item_id", "variant_id", "quantity", "unit_price",
+]
+
+def _export_statement(status_filter: Optional[OrderStatus], created_from: Optional[datetime], created_to: Optional[datetime]):
+    # Plain columns (no ORM objects) so each batch is cheap and nothing is kept around.
+    # Ordered so an order's item rows are always contiguous.
+    stmt = (
+        select(
+            Order.id, Order.user_id, Order.status, Order.total_amount, Order.shipping_address, Order.created_at,
+            OrderItem.id.label("item_id"), OrderItem.variant_id, OrderItem.quantity, OrderItem.unit_price,
+        )
+        .outerjoin(OrderItem, OrderItem.order_id == Order.id)
+        .order_by(Order.created_at, Order.id)
+    )
+    if status_filter:
+        stmt = stmt.filter(Order.status == status_filter)
+    if created_from:
+        stmt = stmt.filter(Order.created_at >= created_from)
+    if created_to:
+        stmt = stmt.filter(Order.created_at < created_to)
+    return stmt.execution_options(yield_per=EXPORT_BATCH_SIZE)
+
+def _order_to_ndjson(row, items: list) -> str:
+    return json.dumps({
+        "id": str(row.id),
+        "user_id": str(row.user_id),
+        "status": row.status.value,
+        "total_amount": str(row.total_amount),
+        "shipping_address": row.shipping_address,
+        "created_at": row.created_at.isoformat() if row.created_at else None,
+        "items": items,
+    }) + "\n"
+
+async def _stream_export(stmt, export_format: str):
+    """
+    Streams from a server-side cursor, one batch at a time, so memory stays flat
+    regardless of how many orders match. Uses its own session because the response
+    outlives the request dependencies; like get_read_db, that is the replica only
+    while it is caught up.
+    """
+    session_factory = await read_session_factory()
+    async with session_factory() as session:
+        result = await session.stream(stmt)
+        
+        if export_format == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(EXPORT_CSV_COLUMNS)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            async for batch in result.partitions():
+                writer.writerows(
+                    (
+                        r.id, r.user_id, r.status.value, r.total_amount, r.shipping_address,
+                        r.created_at.isoformat() if r.created_at else "",
+                        r.item_id or "", r.variant_id or "", r.quantity or "", r.unit_price or "",
+                    )
+                    for r in batch
+                )
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            return
+        
+        # NDJSON: one line per order with its items nested
+        current, items = None, []
+        async for batch in result.partitions():
+            chunk = []
+            for r in batch:
+                if current is not None and r.id != current.id:
+                    chunk.append(_order_to_ndjson(current, items))
+                    items = []
+                current = r
+                if r.item_id is not None:
+                    items.append({
+                        "id": str(r.item_id),
+                        "variant_id": str(r.variant_id),
+                        "quantity": r.quantity,
+                        "unit_price": str(r.unit_price),
+                    })
+            if chunk:
+                yield "".join(chunk)
+        if current is not None:
+            yield _order_to_ndjson(current, items)
+
+@router.get("/admin/export")
+async def export_orders(
+    export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    status_filter: Optional[OrderStatus] = Query(None, alias="status"),
+    created_from: Optional[datetime] = Query(None, description="Inclusive lower bound on created_at"),
+    created_to: Optional[datetime] = Query(None, description="Exclusive upper bound on created_at"),
+    current_admin: User = Depends(get_current_admin)
+):
+    """
+    Stream orders with their items as NDJSON (one order per line) or CSV (one item per row).
+    """
+    stmt = _export_statement(status_filter, created_from, created_to)
+    media_type = "text/csv" if export_format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        _stream_export(stmt, export_format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="orders.{export_format}"'},
     )
-    return result.scalars().all()
\ No newline at end of file
@@ -17,6 +17,7 @@ from decimal import Decimal
 
 # IMPORT EMAIL FUNCTION
 from app.core.email import send_order_confirmation_email
+from app.core.etag import order_versions
 
 router = APIRouter()
 
@@ -129,6 +130,7 @@ async def stripe_webhook(
             if order:
                 order.status = OrderStatus.PAID
                 await db.commit()
+                await order_versions.bump(order.user_id)
                 
                 # --- EMAIL LOGIC START ---
                 # Fetch User to get email address
@@ -160,6 +162,7 @@ async def test_payment_success(
     if order:
         order.status = OrderStatus.PAID
         await db.commit()
+        await order_versions.bump(order.user_id)
         
         # Trigger Test Email
         user_res = await db.execute(select(User).filter(User.id == order.user_id))
@@ -1,28 +1,123 @@
 # app/api/v1/endpoints/products.py
-from fastapi import APIRouter, Depends, HTTPException, status, WebSocket, WebSocketDisconnect, Query
+from fastapi import APIRouter, Depends, HTTPException, status, WebSocket, WebSocketDisconnect, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update
+from sqlalchemy import select, update, tuple_, func, or_, and_, cast, Double, exists, distinct, true, any_, bindparam, String, literal_column
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.orm import selectinload
-from pydantic import BaseModel, Field
-from typing import List
+from pydantic import BaseModel, Field, TypeAdapter, model_validator
+from typing import List, Optional, Dict
+from decimal import Decimal
+import json
+import uuid
 
+from app.config import get_settings
 from app.database import get_db
 from app.models.product import Product, Category, ProductVariant
 from app.schemas.product import (
     ProductCreate, ProductResponse, 
     CategoryCreate, CategoryResponse,
-    ProductVariantBase # We use this base for creating variants
+    ProductVariantBase, # We use this base for creating variants
+    ImportReport
 )
 from app.api.deps import get_current_user, get_current_admin
 from app.models.user import User
 from app.api.v1.endpoints.websocket import manager
+from app.core.pagination import encode_cursor, decode_cursor, NEXT_CURSOR_HEADER
+from app.core.catalog_cache import catalog_cache, cache_key, dump_json, get_catalog_db
+from app.core.catalog_import import CatalogImporter
+from app.core.fast_json import product_rows_statement, products_json
+from app.core.trending import trending
+from app.core.inventory import set_stock_levels, adjust_total_inventory, refresh_product_summaries
 
 router = APIRouter()
 
+# Serializers for cached responses (same output as response_model would produce)
+product_list_adapter = TypeAdapter(List[ProductResponse])
+category_list_adapter = TypeAdapter(List[CategoryResponse])
+
+# --- Listing Filters ---
+class ProductFilters:
+    """
+    Query filters shared by the product listing and the facet counts.
+    Variant-level conditions (attributes, price, stock) must all hold for the same
+    variant. Repeating a key (attr=color:Red&attr=color:Blue) means either value.
+    """
+
+    def __init__(
+        self,
+        category_id: Optional[uuid.UUID] = None,
+        attr: List[str] = Query([], description="Attribute filter as key:value, e.g. color:Red (repeatable)"),
+        min_price: Optional[Decimal] = Query(None, ge=0),
+        max_price: Optional[Decimal] = Query(None, ge=0),
+        in_stock: bool = Query(False, description="Only products with at least one variant in stock"),
+    ):
+        self.category_id = category_id
+        self.min_price = min_price
+        self.max_price = max_price
+        self.in_stock = in_stock
+        self.attributes: Dict[str, List[str]] = {}
+        for pair in attr:
+            key, sep, value = pair.partition(":")
+            if not sep or not key or not value:
+                raise HTTPException(status_code=400, detail=f"Invalid attribute filter '{pair}', expected key:value")
+            self.attributes.setdefault(key, []).append(value)
+
+    def variant_conditions(self) -> list:
+        conditions = []
+        for key, values in self.attributes.items():
+            # @> is served by the jsonb_path_ops GIN index
+            conditions.append(or_(*(ProductVariant.attributes.contains({key: value}) for value in values)))
+        if self.min_price is not None:
+            conditions.append(ProductVariant.price >= self.min_price)
+        if self.max_price is not None:
+            conditions.append(ProductVariant.price <= self.max_price)
+        if self.in_stock:
+            # Combined with other variant filters, the in-stock variant must be a matching one
+            conditions.append(ProductVariant.inventory_count > 0)
+        return conditions
+
+    def stock_only(self) -> bool:
+        return self.in_stock and not self.attributes and self.min_price is None and self.max_price is None
+
+    def apply(self, stmt):
+        """Restrict a select over Product."""
+        if self.category_id:
+            stmt = stmt.filter(Product.category_id == self.category_id)
+        if self.stock_only():
+            # Denormalized total; served by ix_products_in_stock_name_id
+            return stmt.filter(Product.total_inventory > 0)
+        conditions = self.variant_conditions()
+        if conditions:
+            stmt = stmt.filter(exists().where(ProductVariant.product_id == Product.id, *conditions))
+        return stmt
+
+    def cache_params(self) -> dict:
+        return {
+            "category_id": self.category_id,
+            "attr": sorted((k, sorted(v)) for k, v in self.attributes.items()) or None,
+            "min_price": self.min_price,
+            "max_price": self.max_price,
+            "in_stock": self.in_stock or None,
+        }
+
 # --- Helper Schema for Stock Update ---
 class StockUpdate(BaseModel):
     stock: int = Field(ge=0, description="New inventory count")
 
+class BatchStockItem(BaseModel):
+    variant_id: Optional[uuid.UUID] = None
+    sku: Optional[str] = None
+    stock: int = Field(ge=0, description="New inventory count")
+
+    @model_validator(mode="after")
+    def one_identifier(self):
+        if (self.variant_id is None) == (self.sku is None):
+            raise ValueError("Provide exactly one of variant_id or sku")
+        return self
+
+class BatchStockUpdate(BaseModel):
+    items: List[BatchStockItem] = Field(min_length=1, max_length=50_000)
+
 # --- Categories ---
 
 @router.post("/categories", response_model=CategoryResponse, status_code=status.HTTP_201_CREATED)
@@ -35,12 +130,16 @@ async def create_category(
     db.add(category)
     await db.commit()
     await db.refresh(category)
+    await catalog_cache.bump()
     return category
 
 @router.get("/categories", response_model=List[CategoryResponse])
-async def list_categories(db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(Category))
-    return result.scalars().all()
+async def list_categories(request: Request, db: AsyncSession = Depends(get_catalog_db)):
+    async def build():
+        result = await db.execute(select(Category))
+        return dump_json(category_list_adapter, result.scalars().all()), {}
+    
+    return await catalog_cache.respond(request, cache_key("categories"), build)
 
 # --- Products ---
 
@@ -72,6 +171,8 @@ async def create_product(
         product.variants.append(variant)
 
     db.add(product)
+    await db.flush()
+    await refresh_product_summaries(db, [product.id])
     await db.commit()
     
     # --- FIX START (MissingGreenlet Error) ---
@@ -88,19 +189,206 @@ async def create_product(
     product = result.scalar_one()
     # --- FIX END ---
 
+    await catalog_cache.bump()
     return product
 
+def build_list_statement(filters: ProductFilters, sort: str, cursor: Optional[str], limit: int, skip: int = 0):
+    """
+    The GET /products/ page query and the row -> cursor key function.
+    Keyset pagination on (name, id) or (min_price, id), backed by ix_products_name_id /
+    ix_products_min_price_id. Fast path: plain columns with the variants aggregated in
+    SQL, no ORM objects or schema validation.
+    """
+    stmt = (
+        product_rows_statement()
+        .add_columns(Product.min_price)
+        .limit(limit + 1) # One extra row tells us whether there is a next page
+    )
+    if sort == "name":
+        stmt = stmt.order_by(Product.name, Product.id)
+        sort_key = lambda p: (p.name, p.id)
+        if cursor:
+            last_name, last_id = decode_cursor(cursor, str, uuid.UUID)
+            stmt = stmt.filter(tuple_(Product.name, Product.id) > tuple_(last_name, last_id))
+    else:
+        stmt = stmt.filter(Product.min_price.is_not(None))
+        sort_key = lambda p: (p.min_price, p.id)
+        if sort == "price_asc":
+            stmt = stmt.order_by(Product.min_price, Product.id)
+        else:
+            stmt = stmt.order_by(Product.min_price.desc(), Product.id.desc())
+        if cursor:
+            last_price, last_id = decode_cursor(cursor, Decimal, uuid.UUID)
+            key_cols, key_vals = tuple_(Product.min_price, Product.id), tuple_(last_price, last_id)
+            stmt = stmt.filter(key_cols > key_vals if sort == "price_asc" else key_cols < key_vals)
+    if skip and not cursor:
+        stmt = stmt.offset(skip)
+    stmt = filters.apply(stmt)
+    return stmt, sort_key
+
 @router.get("/", response_model=List[ProductResponse])
 async def list_products(
-    skip: int = 0, 
-    limit: int = 100, 
-    db: AsyncSession = Depends(get_db)
+    request: Request,
+    cursor: Optional[str] = Query(None, description="Opaque token from the X-Next-Cursor header of the previous page"),
+    limit: int = Query(100, ge=1, le=get_settings().MAX_PAGE_SIZE),
+    skip: int = Query(0, ge=0, deprecated=True, description="Use cursor instead; ignored when cursor is given"),
+    sort: str = Query("name", pattern="^(name|price_asc|price_desc)$", description="Price sorts use the lowest variant price and skip products without variants"),
+    filters: ProductFilters = Depends(),
+    db: AsyncSession = Depends(get_catalog_db)
 ):
-    # Use selectinload to get variants in the same query (prevent N+1 problems)
-    result = await db.execute(
-        select(Product).options(selectinload(Product.variants)).offset(skip).limit(limit)
+    stmt, sort_key = build_list_statement(filters, sort, cursor, limit, skip)
+    
+    # Pages are identical for every caller, so serve them from the catalog cache
+    async def build():
+        result = await db.execute(stmt)
+        products = result.all()
+        
+        headers = {}
+        if len(products) > limit:
+            products = products[:limit]
+            headers[NEXT_CURSOR_HEADER] = encode_cursor(*sort_key(products[-1]))
+        return products_json(products), headers
+    
+    key = cache_key("products", cursor=cursor, limit=limit, skip=skip, sort=sort, **filters.cache_params())
+    return await catalog_cache.respond(request, key, build)
+
+@router.get("/facets", response_model=Dict[str, Dict[str, int]])
+async def product_facets(
+    request: Request,
+    filters: ProductFilters = Depends(),
+    db: AsyncSession = Depends(get_catalog_db)
+):
+    """
+    Number of matching products per attribute value, e.g. {"color": {"Red": 120, "Blue": 80}}.
+    Uses the same filters as the listing; computed in a single aggregate query.
+    """
+    kv = func.jsonb_each_text(ProductVariant.attributes).table_valued("key", "value").lateral("kv")
+    stmt = (
+        select(kv.c.key, kv.c.value, func.count(distinct(ProductVariant.product_id)))
+        .select_from(ProductVariant)
+        .join(kv, true())
+        .filter(*filters.variant_conditions())
+        .group_by(kv.c.key, kv.c.value)
     )
-    return result.scalars().all()
+    if filters.category_id:
+        stmt = stmt.join(Product, Product.id == ProductVariant.product_id).filter(Product.category_id == filters.category_id)
+    
+    async def build():
+        facets: Dict[str, Dict[str, int]] = {}
+        for key, value, count in (await db.execute(stmt)).all():
+            facets.setdefault(key, {})[value] = count
+        return json.dumps(facets).encode(), {}
+    
+    return await catalog_cache.respond(request, cache_key("facets", **filters.cache_params()), build)
+
+@router.get("/trending", response_model=List[ProductResponse])
+async def trending_products(
+    request: Request,
+    category_id: Optional[uuid.UUID] = None,
+    limit: int = Query(10, ge=1, le=get_settings().TRENDING_TOP_N),
+    db: AsyncSession = Depends(get_catalog_db)
+):
+    """
+    Bestsellers with time decay (recent sales count more), overall or within a category.
+    Rankings are precomputed in memory and refreshed every TRENDING_FLUSH_SECONDS.
+    """
+    product_ids = trending.top(category_id)[:limit]
+    
+    async def build():
+        if not product_ids:
+            return b"[]", {}
+        result = await db.execute(product_rows_statement().filter(Product.id.in_(product_ids)))
+        by_id = {row.id: row for row in result.all()}
+        return products_json(by_id[p] for p in product_ids if p in by_id), {}
+    
+    key = cache_key("trending", category_id=category_id, limit=limit, rankings=trending.version)
+    return await catalog_cache.respond(request, key, build)
+
+# --- Bulk Import ---
+
+@router.post("/import", response_model=ImportReport)
+async def import_products(
+    request: Request,
+    import_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    db: AsyncSession = Depends(get_db),
+    current_admin: User = Depends(get_current_admin)
+):
+    """
+    Bulk upsert products and variants from a streamed NDJSON or CSV body (one variant per row).
+
+    Row fields: product_sku, name, description, category_id, is_active, sku, price,
+    inventory_count, attributes (JSON object; a JSON string in CSV).
+    Products are matched on product_sku and variants on sku; existing rows are updated.
+    Rows are validated and loaded in batches; invalid rows are reported by line number.
+    """
+    report = await CatalogImporter(db).run(request.stream(), import_format)
+    if report.imported:
+        await catalog_cache.bump()
+    return report
+
+# --- Search ---
+SEARCH_TEXT_CONFIG = "english"
+
+def build_search_statement(q: str, category_id: Optional[uuid.UUID], cursor: Optional[str], limit: int):
+    """
+    Ranked full-text match on name/description (GIN on search_vector), OR'ed with
+    trigram similarity on name (GIN gin_trgm_ops) so typos still find products.
+    Keyset pagination on (rank DESC, id).
+
+    Broad queries ("red shirt") can match tens of thousands of rows, and every match
+    would have to be ranked before the LIMIT applies. Only the first
+    SEARCH_MAX_CANDIDATES index matches are ranked, which keeps latency flat; for
+    queries that broad the results are the best of those candidates.
+    """
+    # Config inlined as a constant (a regconfig bind can't be rendered for EXPLAIN checks)
+    ts_query = func.websearch_to_tsquery(literal_column(f"'{SEARCH_TEXT_CONFIG}'::regconfig"), q)
+    # double precision so the rank round-trips exactly through the cursor
+    rank = cast(func.ts_rank_cd(Product.search_vector, ts_query) + func.similarity(Product.name, q), Double)
+    
+    # LIMIT keeps Postgres from flattening the subquery: the cap applies before ranking
+    candidates = (
+        select(Product.id)
+        .filter(or_(Product.search_vector.op("@@")(ts_query), Product.name.op("%")(q)))
+        .filter(Product.is_active)
+    )
+    if category_id:
+        candidates = candidates.filter(Product.category_id == category_id)
+    candidates = candidates.limit(get_settings().SEARCH_MAX_CANDIDATES).subquery("candidates")
+    
+    stmt = (
+        select(Product, rank.label("rank"))
+        .join(candidates, candidates.c.id == Product.id)
+        .options(selectinload(Product.variants))
+        .order_by(rank.desc(), Product.id)
+        .limit(limit + 1) # One extra row tells us whether there is a next page
+    )
+    if cursor:
+        last_rank, last_id = decode_cursor(cursor, float, uuid.UUID)
+        stmt = stmt.filter(or_(rank < last_rank, and_(rank == last_rank, Product.id > last_id)))
+    return stmt
+
+@router.get("/search", response_model=List[ProductResponse])
+async def search_products(
+    request: Request,
+    q: str = Query(..., min_length=2, max_length=200),
+    category_id: Optional[uuid.UUID] = None,
+    cursor: Optional[str] = Query(None, description="Opaque token from the X-Next-Cursor header of the previous page"),
+    limit: int = Query(20, ge=1, le=get_settings().MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_catalog_db)
+):
+    stmt = build_search_statement(q, category_id, cursor, limit)
+    
+    async def build():
+        rows = (await db.execute(stmt)).all()
+        
+        headers = {}
+        if len(rows) > limit:
+            rows = rows[:limit]
+            headers[NEXT_CURSOR_HEADER] = encode_cursor(repr(rows[-1].rank), rows[-1].Product.id)
+        return dump_json(product_list_adapter, [row.Product for row in rows]), headers
+    
+    key = cache_key("search", q=q, category_id=category_id, cursor=cursor, limit=limit)
+    return await catalog_cache.respond(request, key, build)
 
 # --- Inventory Management with Row Locking ---
 
@@ -124,9 +412,11 @@ async def update_stock(
     
     old_stock = variant.inventory_count
     variant.inventory_count = stock_data.stock
+    await adjust_total_inventory(db, {variant.product_id: stock_data.stock - old_stock})
     
     # 2. Commit the changes
     await db.commit()
+    await catalog_cache.bump()
     
     # 3. Broadcast update via WebSocket
     # We use the product_id because clients usually subscribe to a Product, not a specific Variant ID
@@ -139,6 +429,69 @@ async def update_stock(
 
     return {"variant_id": str(variant.id), "old_stock": old_stock, "new_stock": stock_data.stock}
 
+@router.patch("/variants/stock")
+async def update_stock_batch(
+    batch: BatchStockUpdate,
+    db: AsyncSession = Depends(get_db),
+    current_admin: User = Depends(get_current_admin)
+):
+    """
+    Set stock for many variants (by variant_id or sku) in one transaction.
+    If an identifier appears more than once, the last entry wins.
+    Emits one coalesced 'stock_update_batch' WebSocket event per affected product.
+    """
+    # 1. Resolve SKUs to ids in one query (a single array parameter, whatever the batch size)
+    skus = {item.sku for item in batch.items if item.sku is not None}
+    id_by_sku = {}
+    if skus:
+        result = await db.execute(
+            select(ProductVariant.sku, ProductVariant.id)
+            .filter(ProductVariant.sku == any_(bindparam("skus", list(skus), type_=ARRAY(String))))
+        )
+        id_by_sku = dict(result.all())
+    
+    stock_by_variant: Dict[uuid.UUID, int] = {}
+    not_found = []
+    for item in batch.items:
+        variant_id = item.variant_id or id_by_sku.get(item.sku)
+        if variant_id is None:
+            not_found.append(item.sku)
+            continue
+        stock_by_variant[variant_id] = item.stock
+    
+    # 2. Lock (in id order) and update everything with set-based statements
+    rows = await set_stock_levels(db, stock_by_variant)
+    updated_ids = {row.id for row in rows}
+    not_found.extend(str(v) for v in stock_by_variant if v not in updated_ids)
+    
+    deltas: Dict[uuid.UUID, int] = {}
+    for row in rows:
+        deltas[row.product_id] = deltas.get(row.product_id, 0) + row.new_stock - row.old_stock
+    await adjust_total_inventory(db, deltas)
+    
+    await db.commit()
+    if rows:
+        await catalog_cache.bump()
+    
+    # 3. One WebSocket event per product instead of one per variant
+    by_product: Dict[uuid.UUID, list] = {}
+    for row in rows:
+        by_product.setdefault(row.product_id, []).append({
+            "variant_id": str(row.id),
+            "old_stock": row.old_stock,
+            "new_stock": row.new_stock
+        })
+    for product_id, variants in by_product.items():
+        await manager.broadcast(str(product_id), {"event": "stock_update_batch", "variants": variants})
+    
+    return {
+        "updated": [
+            {"variant_id": str(row.id), "sku": row.sku, "old_stock": row.old_stock, "new_stock": row.new_stock}
+            for row in rows
+        ],
+        "not_found": not_found
+    }
+
 # --- WebSocket Endpoint ---
 # Usage: ws://localhost:8000/api/v1/products/ws/inventory/{product_id}
 @router.websocket("/ws/inventory/{product_id}")
@@ -1,40 +1,132 @@
 # app/api/v1/endpoints/recommendations.py
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from sqlalchemy.orm import selectinload
+from sqlalchemy import select, func
 
-from app.database import get_db
 from app.models.product import Product
 from app.schemas.product import ProductResponse
-from typing import List
+from app.core.catalog_cache import catalog_cache, cache_key, get_catalog_db
+from app.core.fast_json import product_rows_statement, products_json, product_objects, dumps
+from app.core.recommendations import neighbor_index
+from typing import List, Dict
+import uuid
 
 router = APIRouter()
 
-@router.get("/{product_id}", response_model=List[ProductResponse])
-async def get_recommendations(
-    product_id: str,
-    db: AsyncSession = Depends(get_db)
+RECOMMENDATION_COUNT = 4
+MAX_BATCH_PRODUCTS = 100
+
+def neighbor_rows_statement(product_ids):
+    """Active products among the given ids (co-purchase neighbors), fast-path rows."""
+    return product_rows_statement().filter(Product.id.in_(product_ids)).filter(Product.is_active)
+
+def category_candidates_statement(category_ids):
+    """
+    First N active products per category in id order (ix_products_active_category_id_id).
+    A product excludes itself and its already picked neighbors, at most 1 + picked of
+    the candidates, so N = RECOMMENDATION_COUNT + 1 is always enough to fill it up.
+    """
+    ranked = (
+        select(
+            Product.id,
+            func.row_number().over(partition_by=Product.category_id, order_by=Product.id).label("position"),
+        )
+        .filter(Product.category_id.in_(category_ids))
+        .filter(Product.is_active)
+        .subquery()
+    )
+    return (
+        product_rows_statement()
+        .join(ranked, ranked.c.id == Product.id)
+        .filter(ranked.c.position <= RECOMMENDATION_COUNT + 1)
+        .order_by(Product.category_id, Product.id)
+    )
+
+async def recommend(db: AsyncSession, product_ids: List[uuid.UUID]) -> Dict[uuid.UUID, list]:
+    """
+    Recommendations for many products in at most 3 queries, whatever the batch size:
+    co-purchase neighbors (ids from the in-memory index), then each product's category,
+    then same-category top-up candidates. Unknown product ids are left out of the result.
+    The single and batch endpoints both use this, so their output is identical.
+    """
+    picked: Dict[uuid.UUID, list] = {product_id: [] for product_id in product_ids}
+    
+    # 1. Co-purchase neighbors, best first (skipping inactive/removed products)
+    neighbors = {product_id: neighbor_index.get(product_id) for product_id in product_ids}
+    wanted = {n for ids in neighbors.values() for n in ids}
+    if wanted:
+        result = await db.execute(neighbor_rows_statement(wanted))
+        by_id = {row.id: row for row in result.all()}
+        for product_id, ids in neighbors.items():
+            picked[product_id] = [by_id[n] for n in ids if n in by_id][:RECOMMENDATION_COUNT]
+    
+    # 2. Not enough history: fill up with products from the same category
+    short = [product_id for product_id, rows in picked.items() if len(rows) < RECOMMENDATION_COUNT]
+    if not short:
+        return picked
+    result = await db.execute(select(Product.id, Product.category_id).filter(Product.id.in_(short)))
+    category_of = dict(result.all())
+    for product_id in short:
+        if product_id not in category_of and not picked[product_id]:
+            del picked[product_id] # Product not found
+    
+    categories = set(category_of.values())
+    if not categories:
+        return picked
+    result = await db.execute(category_candidates_statement(categories))
+    candidates: Dict[uuid.UUID, list] = {}
+    for row in result.all():
+        candidates.setdefault(row.category_id, []).append(row)
+    
+    for product_id, category_id in category_of.items():
+        rows = picked[product_id]
+        taken = {product_id, *(row.id for row in rows)}
+        for row in candidates.get(category_id, []):
+            if len(rows) >= RECOMMENDATION_COUNT:
+                break
+            if row.id not in taken:
+                rows.append(row)
+    return picked
+
+@router.get("/batch", response_model=Dict[uuid.UUID, List[ProductResponse]])
+async def get_recommendations_batch(
+    request: Request,
+    product_ids: List[uuid.UUID] = Query(..., alias="product_id", description="Repeatable: ?product_id=...&product_id=..."),
+    db: AsyncSession = Depends(get_catalog_db)
 ):
     """
-    Returns 4 other products in the same category as the provided product_id.
+    Recommendations for many products at once (e.g. every tile on a listing page), as
+    {product_id: [...]}. Each list is exactly what /recommendations/{product_id} returns;
+    unknown product ids are left out.
     """
-    # 1. Find the current product to get its category
-    product_result = await db.execute(select(Product).filter(Product.id == product_id))
-    current_product = product_result.scalar_one_or_none()
+    product_ids = sorted(set(product_ids))
+    if len(product_ids) > MAX_BATCH_PRODUCTS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_PRODUCTS} product ids per request")
     
-    if not current_product:
-        raise HTTPException(status_code=404, detail="Product not found")
+    async def build():
+        picked = await recommend(db, product_ids)
+        return dumps({str(product_id): product_objects(rows) for product_id, rows in picked.items()}), {}
     
-    # 2. Find related products (Same category, NOT the current product)
-    # Limit to 4 recommendations
-    result = await db.execute(
-        select(Product)
-        .options(selectinload(Product.variants)) # We need variants for price/images
-        .filter(Product.category_id == current_product.category_id)
-        .filter(Product.id != current_product.id)
-        .limit(4)
-    )
+    # The build id in the key retires cached responses when a new index is loaded
+    key = cache_key("recommendations-batch", product_ids=",".join(map(str, product_ids)), build=neighbor_index.build_id)
+    return await catalog_cache.respond(request, key, build)
+
+@router.get("/{product_id}", response_model=List[ProductResponse])
+async def get_recommendations(
+    product_id: uuid.UUID,
+    request: Request,
+    db: AsyncSession = Depends(get_catalog_db)
+):
+    """
+    Returns 4 products frequently bought together with product_id (co-purchase index,
+    see build_recommendations.py), topped up with other products from the same category.
+    """
+    async def build():
+        picked = await recommend(db, [product_id])
+        if product_id not in picked:
+            raise HTTPException(status_code=404, detail="Product not found")
+        return products_json(picked[product_id]), {}
     
-    recommendations = result.scalars().all()
-    return recommendations
\ No newline at end of file
+    # The build id in the key retires cached responses when a new index is loaded
+    key = cache_key("recommendations", product_id=product_id, build=neighbor_index.build_id)
+    return await catalog_cache.respond(request, key, build)
@@ -1,25 +1,43 @@
 # app/api/v1/endpoints/users.py
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from typing import List
+from sqlalchemy import select, tuple_
+from typing import List, Optional
+import uuid
 
+from app.config import get_settings
 from app.database import get_db
 from app.models.user import User
 from app.schemas.user import UserResponse, UserUpdateRole
-from app.api.deps import get_current_admin
+from app.api.deps import get_current_admin, invalidate_cached_user
+from app.core.revocation import revocation_list
+from app.core.pagination import encode_cursor, decode_cursor, NEXT_CURSOR_HEADER
 
 router = APIRouter()
 
 @router.get("/", response_model=List[UserResponse])
 async def list_users(
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    cursor: Optional[str] = Query(None, description="Opaque token from the X-Next-Cursor header of the previous page"),
+    limit: int = Query(100, ge=1, le=get_settings().MAX_PAGE_SIZE),
+    skip: int = Query(0, ge=0, deprecated=True, description="Use cursor instead; ignored when cursor is given"),
     db: AsyncSession = Depends(get_db),
     current_admin: User = Depends(get_current_admin) # Only Admins can list users
 ):
-    result = await db.execute(select(User).offset(skip).limit(limit))
+    # Keyset pagination on (username, id), backed by ix_users_username_id
+    stmt = select(User).order_by(User.username, User.id).limit(limit + 1)
+    if cursor:
+        last_username, last_id = decode_cursor(cursor, str, uuid.UUID)
+        stmt = stmt.filter(tuple_(User.username, User.id) > tuple_(last_username, last_id))
+    elif skip:
+        stmt = stmt.offset(skip)
+    
+    result = await db.execute(stmt)
     users = result.scalars().all()
+    
+    if len(users) > limit:
+        users = users[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(users[-1].username, users[-1].id)
     return users
 
 @router.patch("/{user_id}/role", response_model=UserResponse)
@@ -36,9 +54,37 @@ async def update_user_role(
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    # Update role
+    # Update role (and bump token version so stateless tokens with the old role die)
     user.role = role_update.role
+    user.token_version += 1
+    await db.commit()
+    await db.refresh(user)
+    
+    # Drop the cached identity so the new role applies on the next request
+    invalidate_cached_user(user.id)
+    revocation_list.record(user.id, user.token_version, user.is_active)
+    
+    return user
+
+@router.patch("/{user_id}/deactivate", response_model=UserResponse)
+async def deactivate_user(
+    user_id: str, # UUID as string
+    db: AsyncSession = Depends(get_db),
+    current_admin: User = Depends(get_current_admin) # Only Admins
+):
+    result = await db.execute(select(User).filter(User.id == user_id))
+    user = result.scalar_one_or_none()
+    
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    user.is_active = False
+    user.token_version += 1
     await db.commit()
     await db.refresh(user)
     
-    return user
\ No newline at end of file
+    # Deactivated users must be rejected immediately, not after the cache TTL
+    invalidate_cached_user(user.id)
+    revocation_list.record(user.id, user.token_version, user.is_active)
+    
+    return user
@@ -24,11 +24,93 @@ class Settings(BaseSettings):
     POSTGRES_DB: str
     DATABASE_URL: str = ""
 
+    # Connection Pool
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: int = 30 # Seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 1800 # Seconds before a connection is replaced
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 500 # asyncpg prepared statements per connection
+    DB_ECHO: bool = False
+    DB_SLOW_QUERY_MS: float = 200.0
+    DB_SLOW_QUERY_SAMPLE_RATE: float = 1.0 # 0.0 - 1.0
+    N_PLUS_ONE_THRESHOLD: int = 5 # Same statement more often than this per request is logged
+
+    # Read Replica (optional, same credentials/db name as the primary)
+    POSTGRES_REPLICA_SERVER: str = ""
+    REPLICA_MAX_LAG_SECONDS: float = 5.0 # Above this, reads fall back to the primary
+    REPLICA_LAG_CHECK_SECONDS: float = 2.0
+
     # Security
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
 
+    # Stateless-claims tokens (opt-in): role/is_active/token version live in the JWT,
+    # so auth needs no DB query. Revocations propagate to other workers within
+    # AUTH_REVOCATION_REFRESH_SECONDS.
+    AUTH_STATELESS_TOKENS: bool = False
+    AUTH_REVOCATION_REFRESH_SECONDS: int = 30 # Also bounds how long other workers' user caches lag a role change / deactivation
+
+    # Pagination
+    MAX_PAGE_SIZE: int = 100
+
+    # Product search: matches ranked per query (broad queries rank only the first N)
+    SEARCH_MAX_CANDIDATES: int = 2000
+
+    # Authenticated-user cache (per process). Role changes / deactivations clear it on the
+    # worker that made them; other workers pick them up from the revocation list within
+    # AUTH_REVOCATION_REFRESH_SECONDS, at the latest after the TTL
+    USER_CACHE_TTL_SECONDS: int = 60
+    USER_CACHE_MAX_SIZE: int = 10000
+
+    # Password hashing pool (bcrypt runs off the event loop)
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 32 # Beyond this, login/register return 503
+
+    # Redis (optional; used by the catalog cache when enabled)
+    REDIS_HOST: str = "localhost"
+    REDIS_PORT: int = 6379
+
+    # Carts: "sql" (carts table) or "redis" (hashes with TTL, written back to Postgres)
+    CART_BACKEND: str = "sql"
+    CART_TTL_SECONDS: int = 7 * 24 * 3600 # Redis only; refreshed on every change
+    CART_PERSIST_SECONDS: int = 30 # Redis only; write-behind interval
+
+    # Cart preview: per-variant price/stock cache (per process)
+    CART_PRICE_CACHE_TTL_SECONDS: int = 10
+    CART_PRICE_CACHE_MAX_SIZE: int = 50000
+
+    # Abandoned-cart sweeper (carts table): also runnable as python sweep_carts.py
+    CART_ABANDONED_DAYS: int = 30 # Carts untouched this long are deleted
+    CART_EMPTY_TTL_HOURS: int = 24 # Empty carts go sooner
+    CART_SWEEP_INTERVAL_SECONDS: int = 3600 # In-app sweeper; 0 disables it (e.g. when run from cron)
+    CART_SWEEP_BATCH_SIZE: int = 1000 # Rows deleted per transaction
+    CART_SWEEP_PAUSE_SECONDS: float = 0.05 # Between batches, to leave room for live traffic
+
+    # Catalog response cache
+    CATALOG_CACHE_TTL_SECONDS: int = 30
+    CATALOG_CACHE_MAX_ENTRIES: int = 2000
+    CATALOG_CACHE_REDIS: bool = False
+
+    # ETags: without Redis, catalog/order versions are per worker, so a worker can answer
+    # 304 for data another worker changed; those ETags expire (catalog after
+    # CATALOG_CACHE_TTL_SECONDS, order lists after ORDER_ETAG_LOCAL_TTL_SECONDS).
+    # Enable Redis for immediate cross-worker invalidation.
+    ORDER_ETAG_REDIS: bool = False
+    ORDER_ETAG_LOCAL_TTL_SECONDS: int = 30 # Without Redis, order-list ETags expire after this long
+
+    # Co-purchase recommendations (index built offline by build_recommendations.py)
+    RECOMMENDATIONS_TOP_K: int = 20 # Neighbors stored per product
+    RECOMMENDATIONS_MIN_CO_PURCHASES: int = 2 # Pairs bought together fewer times are ignored
+    RECOMMENDATIONS_REFRESH_SECONDS: int = 300 # How often workers check for a new build
+
+    # Trending products (decayed hourly sales counters)
+    TRENDING_TOP_N: int = 20
+    TRENDING_HALF_LIFE_HOURS: float = 24.0 # A sale counts half as much after this long
+    TRENDING_WINDOW_HOURS: int = 168 # Older buckets are ignored and pruned
+    TRENDING_FLUSH_SECONDS: int = 60 # Counter flush + rankings reload interval (per worker)
+
     # Stripe Settings
     STRIPE_API_KEY: str = "sk_test_default"
     STRIPE_WEBHOOK_SECRET: str = ""
@@ -37,6 +119,12 @@ class Settings(BaseSettings):
     def SQLALCHEMY_DATABASE_URI(self) -> str:
         return f"postgresql+asyncpg://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_SERVER}/{self.POSTGRES_DB}"
 
+    @property
+    def SQLALCHEMY_REPLICA_DATABASE_URI(self) -> str:
+        if not self.POSTGRES_REPLICA_SERVER:
+            return ""
+        return f"postgresql+asyncpg://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_REPLICA_SERVER}/{self.POSTGRES_DB}"
+
     class Config:
         env_file = ".env"
 
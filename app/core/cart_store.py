@@ -0,0 +1,229 @@
+# app/core/cart_store.py
+import asyncio
+import uuid
+from typing import Iterable, List, Optional
+
+from sqlalchemy import select, update, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import flag_modified
+
+from app.config import get_settings
+from app.database import AsyncSessionLocal
+from app.models.cart import Cart
+from app.schemas.order import CartOperation
+
+settings = get_settings()
+
+# Pluggable cart storage (CART_BACKEND = "sql" | "redis").
+# Items are keyed by variant id: {"<variant_id>": quantity}, so changing a line is a
+# dict/hash operation instead of a scan. get_items() returns None when the session has
+# no cart at all. Changes are applied as a list of CartOperation (add / set / remove),
+# atomically per call. Methods take the request's DB session; the Redis store only
+# touches it when it has to fall back to Postgres.
+
+
+def as_mapping(items) -> dict:
+    """carts.items as {variant_id: quantity}; also reads the old list-of-lines format."""
+    if not items:
+        return {}
+    if isinstance(items, list):
+        mapping: dict = {}
+        for line in items:
+            mapping[line["variant_id"]] = mapping.get(line["variant_id"], 0) + line["quantity"]
+        return mapping
+    return dict(items)
+
+
+def as_lines(mapping: dict) -> list:
+    """{variant_id: quantity} -> [{"variant_id", "quantity"}] (the CartResponse shape)."""
+    return [{"variant_id": variant_id, "quantity": quantity} for variant_id, quantity in mapping.items()]
+
+
+def apply_operations(mapping: dict, operations: Iterable[CartOperation]) -> dict:
+    for operation in operations:
+        variant_id = str(operation.variant_id)
+        if operation.op == "add":
+            mapping[variant_id] = mapping.get(variant_id, 0) + operation.quantity
+        elif operation.op == "set" and operation.quantity > 0:
+            mapping[variant_id] = operation.quantity
+        else: # remove, or set to 0
+            mapping.pop(variant_id, None)
+    return mapping
+
+
+class SQLCartStore:
+    """Carts as rows in carts (items JSON column). Every write is a Postgres transaction."""
+
+    async def get_items(self, db: AsyncSession, session_id: str) -> Optional[dict]:
+        result = await db.execute(select(Cart.items).filter(Cart.session_id == session_id))
+        row = result.one_or_none()
+        if row is None:
+            return None
+        return as_mapping(row.items)
+
+    async def apply(self, db: AsyncSession, session_id: str, operations: List[CartOperation]) -> dict:
+        # 1. Make sure the row exists: FOR UPDATE can't lock a missing row, and two first
+        #    adds for the same session would otherwise both insert it
+        await db.execute(
+            pg_insert(Cart).values(session_id=session_id, items={})
+            .on_conflict_do_nothing(index_elements=[Cart.session_id])
+        )
+        # 2. Row lock: concurrent changes to the same cart must not overwrite each other
+        result = await db.execute(select(Cart).filter(Cart.session_id == session_id).with_for_update())
+        cart = result.scalar_one()
+
+        cart.items = apply_operations(as_mapping(cart.items), operations)
+        flag_modified(cart, "items") # JSON column changes are not tracked otherwise
+        await db.commit()
+        return cart.items
+
+    async def clear(self, db: AsyncSession, session_id: str) -> None:
+        # One UPDATE: the sweeper may delete the row at any time, and a missing row is fine
+        await db.execute(update(Cart).where(Cart.session_id == session_id).values(items={}))
+        await db.commit()
+
+
+# Loads a cart from Postgres into Redis unless another request already did (atomic).
+# ARGV[1] = TTL, ARGV[2..] = field/value pairs. The marker field tells "cart loaded and
+# empty" apart from "not in Redis yet", so a cleared cart is never reloaded from a
+# not-yet-persisted Postgres copy.
+LOAD_CART_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then return 0 end
+redis.call('HSET', KEYS[1], ARGV[2], '1', unpack(ARGV, 3))
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+return 1
+"""
+
+LOADED_FIELD = "__loaded"
+DIRTY_SET_KEY = "carts:dirty"
+PERSIST_BATCH_SIZE = 500
+
+
+class RedisCartStore:
+    """
+    Carts as Redis hashes (cart:{session_id} -> {variant_id: quantity}).
+
+    Adding an item is one atomic HINCRBY, with no row locks or JSON rewrite, and every
+    write refreshes a TTL of CART_TTL_SECONDS. Changed carts are written back to the
+    carts table in the background (write-behind, every CART_PERSIST_SECONDS) so they
+    survive a Redis restart; a cart missing from Redis is loaded back from Postgres.
+    """
+
+    def __init__(self):
+        from app.redis_client import redis_client # Optional dependency
+        self.redis = redis_client
+
+    @staticmethod
+    def _key(session_id: str) -> str:
+        return f"cart:{session_id}"
+
+    @staticmethod
+    def _to_items(fields: dict) -> dict:
+        return {
+            variant_id: int(quantity)
+            for variant_id, quantity in fields.items()
+            if variant_id != LOADED_FIELD and int(quantity) > 0
+        }
+
+    async def _ensure_loaded(self, db: AsyncSession, session_id: str) -> bool:
+        """Make sure Redis holds the cart. Returns False if no cart exists anywhere."""
+        if await self.redis.exists(self._key(session_id)):
+            return True
+        result = await db.execute(select(Cart.items).filter(Cart.session_id == session_id))
+        row = result.one_or_none()
+        if row is None:
+            return False
+        fields = [value for line in as_mapping(row.items).items() for value in line]
+        await self.redis.eval(LOAD_CART_SCRIPT, 1, self._key(session_id), settings.CART_TTL_SECONDS, LOADED_FIELD, *fields)
+        return True
+
+    async def get_items(self, db: AsyncSession, session_id: str) -> Optional[dict]:
+        fields = await self.redis.hgetall(self._key(session_id))
+        if fields:
+            return self._to_items(fields)
+        if not await self._ensure_loaded(db, session_id):
+            return None
+        return self._to_items(await self.redis.hgetall(self._key(session_id)))
+
+    async def apply(self, db: AsyncSession, session_id: str, operations: List[CartOperation]) -> dict:
+        key = self._key(session_id)
+        await self._ensure_loaded(db, session_id)
+        # One MULTI: the whole batch applies atomically, in order
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hsetnx(key, LOADED_FIELD, "1") # Brand-new cart
+            for operation in operations:
+                variant_id = str(operation.variant_id)
+                if operation.op == "add":
+                    pipe.hincrby(key, variant_id, operation.quantity)
+                elif operation.op == "set" and operation.quantity > 0:
+                    pipe.hset(key, variant_id, operation.quantity)
+                else: # remove, or set to 0
+                    pipe.hdel(key, variant_id)
+            pipe.expire(key, settings.CART_TTL_SECONDS)
+            pipe.sadd(DIRTY_SET_KEY, session_id)
+            pipe.hgetall(key)
+            *_, fields = await pipe.execute()
+        return self._to_items(fields)
+
+    async def clear(self, db: AsyncSession, session_id: str) -> None:
+        key = self._key(session_id)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.delete(key)
+            pipe.hset(key, LOADED_FIELD, "1") # Keep the (empty) cart so Postgres isn't consulted
+            pipe.expire(key, settings.CART_TTL_SECONDS)
+            pipe.sadd(DIRTY_SET_KEY, session_id)
+            await pipe.execute()
+
+    async def persist(self) -> int:
+        """Write changed carts back to Postgres. Returns how many were written."""
+        written = 0
+        while True:
+            session_ids = await self.redis.spop(DIRTY_SET_KEY, PERSIST_BATCH_SIZE)
+            if not session_ids:
+                return written
+            written_back = False
+            try:
+                async with self.redis.pipeline(transaction=False) as pipe:
+                    for session_id in session_ids:
+                        pipe.hgetall(self._key(session_id))
+                    carts = await pipe.execute()
+
+                # Expired carts (empty hash) are left alone in Postgres
+                rows = [
+                    {"id": uuid.uuid4(), "session_id": session_id, "items": self._to_items(fields)}
+                    for session_id, fields in zip(session_ids, carts) if fields
+                ]
+                if rows:
+                    stmt = pg_insert(Cart).values(rows)
+                    stmt = stmt.on_conflict_do_update(
+                        index_elements=[Cart.session_id],
+                        set_={"items": stmt.excluded.items, "updated_at": func.now()},
+                    )
+                    async with AsyncSessionLocal() as db:
+                        await db.execute(stmt)
+                        await db.commit()
+                written_back = True
+                written += len(rows)
+            finally:
+                if not written_back:
+                    # Failed or cancelled (shutdown): put them back for the next round
+                    await self.redis.sadd(DIRTY_SET_KEY, *session_ids)
+
+    async def run_persist_loop(self) -> None:
+        """Background task: write-behind to Postgres."""
+        while True:
+            await asyncio.sleep(settings.CART_PERSIST_SECONDS)
+            try:
+                await self.persist()
+            except Exception as e:
+                print(f"❌ Cart persistence failed: {e}")
+
+
+def _create_cart_store():
+    if settings.CART_BACKEND == "redis":
+        return RedisCartStore()
+    return SQLCartStore()
+
+
+cart_store = _create_cart_store()
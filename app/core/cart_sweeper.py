@@ -0,0 +1,58 @@
+# app/core/cart_sweeper.py
+import asyncio
+
+from sqlalchemy import text
+
+from app.config import get_settings
+from app.database import AsyncSessionLocal
+
+settings = get_settings()
+
+# Abandoned-cart garbage collection.
+# Deletes carts untouched for CART_ABANDONED_DAYS, and empty carts after
+# CART_EMPTY_TTL_HOURS, in batches of CART_SWEEP_BATCH_SIZE. Each batch is its own
+# short transaction and SKIP LOCKED passes over carts that are being written right
+# now, so the sweeper never queues behind live traffic (or makes it queue).
+# Several workers can sweep at once without deleting the same rows twice.
+
+SWEEP_BATCH_SQL = text("""
+    DELETE FROM carts
+    WHERE id IN (
+        SELECT id FROM carts
+        WHERE updated_at < now() - make_interval(hours => :empty_ttl_hours)
+          AND (updated_at < now() - make_interval(days => :abandoned_days) OR items::text IN ('{}', '[]'))
+        LIMIT :batch_size
+        FOR UPDATE SKIP LOCKED
+    )
+""")
+
+async def sweep_carts(max_batches: int = 0) -> int:
+    """Delete expired carts; returns how many. max_batches = 0 means until none are left."""
+    # Cutoffs use the DB clock, same as carts.updated_at
+    params = {
+        "abandoned_days": settings.CART_ABANDONED_DAYS,
+        "empty_ttl_hours": settings.CART_EMPTY_TTL_HOURS,
+        "batch_size": settings.CART_SWEEP_BATCH_SIZE,
+    }
+    
+    deleted = batches = 0
+    while True:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(SWEEP_BATCH_SQL, params)
+            await db.commit()
+        deleted += result.rowcount
+        batches += 1
+        if result.rowcount < settings.CART_SWEEP_BATCH_SIZE or batches == max_batches:
+            return deleted
+        await asyncio.sleep(settings.CART_SWEEP_PAUSE_SECONDS)
+
+async def run_sweep_loop() -> None:
+    """Background task for the app lifespan."""
+    while True:
+        await asyncio.sleep(settings.CART_SWEEP_INTERVAL_SECONDS)
+        try:
+            deleted = await sweep_carts()
+            if deleted:
+                print(f"✅ Cart sweeper: deleted {deleted} expired carts")
+        except Exception as e:
+            print(f"❌ Cart sweeper failed: {e}")
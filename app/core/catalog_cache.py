@@ -0,0 +1,154 @@
+# app/core/catalog_cache.py
+import json
+import time
+from typing import AsyncGenerator, Awaitable, Callable, Optional
+
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.core.cache import TTLCache
+from app.core.etag import PROCESS_EPOCH, make_etag, etag_matches, not_modified, time_bucket
+from app.database import read_session_factory
+
+settings = get_settings()
+
+# (serialized JSON body, extra response headers)
+CachedPayload = tuple[bytes, dict]
+
+VERSION_KEY = "catalog:version"
+BUMPED_AT_KEY = "catalog:bumped_at"
+
+
+class CatalogCache:
+    """
+    Read-through cache for serialized catalog responses (products, categories, recommendations).
+
+    Tier 1 is an in-process LRU with a TTL; tier 2 is Redis (optional, CATALOG_CACHE_REDIS).
+    Keys embed the catalog version, so invalidation is a single version bump: every
+    older entry simply stops being addressed and ages out. With Redis the version is
+    shared by all workers; without it each worker only sees its own bumps and other
+    workers' changes show up within CATALOG_CACHE_TTL_SECONDS (cache entries and ETags
+    both expire after that long).
+
+    Entries for a new version must not be built from a replica that hasn't replayed
+    the write behind the bump yet, so catalog endpoints read through get_catalog_db().
+    """
+
+    def __init__(self):
+        self.local = TTLCache(max_size=settings.CATALOG_CACHE_MAX_ENTRIES, ttl_seconds=settings.CATALOG_CACHE_TTL_SECONDS)
+        self._local_version = 0
+        self._local_bumped_at = 0.0
+        self._redis = None
+        if settings.CATALOG_CACHE_REDIS:
+            from app.redis_client import redis_client # Optional dependency
+            self._redis = redis_client
+
+    async def version_info(self) -> tuple[int, float]:
+        """(current version, time.time() of the bump that produced it)."""
+        if self._redis is not None:
+            try:
+                version, bumped_at = await self._redis.mget(VERSION_KEY, BUMPED_AT_KEY)
+                return int(version or 0), float(bumped_at or 0)
+            except Exception as e:
+                print(f"❌ Catalog cache: Redis unavailable, using local version: {e}")
+        return self._local_version, self._local_bumped_at
+
+    async def version(self) -> int:
+        return (await self.version_info())[0]
+
+    async def bump(self) -> int:
+        """Invalidate everything cached so far. Call after the mutating transaction commits."""
+        self._local_version += 1
+        self._local_bumped_at = time.time()
+        if self._redis is not None:
+            try:
+                async with self._redis.pipeline(transaction=True) as pipe:
+                    pipe.incr(VERSION_KEY)
+                    pipe.set(BUMPED_AT_KEY, self._local_bumped_at)
+                    version, _ = await pipe.execute()
+                return int(version)
+            except Exception as e:
+                print(f"❌ Catalog cache: failed to bump Redis version: {e}")
+        return self._local_version
+
+    async def get_or_build(self, key: str, build: Callable[[], Awaitable[CachedPayload]], version: Optional[int] = None) -> CachedPayload:
+        if version is None:
+            version = await self.version()
+        versioned_key = f"catalog:{version}:{key}"
+        
+        # 1. In-process tier
+        payload = self.local.get(versioned_key)
+        if payload is not None:
+            return payload
+        
+        # 2. Redis tier
+        if self._redis is not None:
+            try:
+                raw = await self._redis.get(versioned_key)
+                if raw is not None:
+                    envelope = json.loads(raw)
+                    payload = (envelope["body"].encode(), envelope["headers"])
+                    self.local.set(versioned_key, payload)
+                    return payload
+            except Exception as e:
+                print(f"❌ Catalog cache: Redis read failed: {e}")
+        
+        # 3. Build from the DB and fill both tiers
+        payload = await build()
+        self.local.set(versioned_key, payload)
+        if self._redis is not None:
+            try:
+                envelope = json.dumps({"body": payload[0].decode(), "headers": payload[1]})
+                await self._redis.set(versioned_key, envelope, ex=settings.CATALOG_CACHE_TTL_SECONDS)
+            except Exception as e:
+                print(f"❌ Catalog cache: Redis write failed: {e}")
+        return payload
+
+    def etag(self, version: int, key: str) -> str:
+        # Redis versions are shared by all workers. Local ones need the process epoch, and
+        # expire with the cache TTL: this worker never hears about other workers' bumps
+        if self._redis is not None:
+            return make_etag("cr", version, key)
+        return make_etag(f"c{PROCESS_EPOCH}", version, time_bucket(settings.CATALOG_CACHE_TTL_SECONDS), key)
+
+    async def respond(self, request: Request, key: str, build: Callable[[], Awaitable[CachedPayload]]) -> Response:
+        # The version get_catalog_db() chose the session for, so a bump in between can't
+        # get replica rows cached under the newer version
+        version = getattr(request.state, "catalog_version", None)
+        if version is None:
+            version = await self.version()
+        etag = self.etag(version, key)
+        
+        # Conditional GET: unchanged catalog -> 304 without touching the cache or the DB
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return not_modified(etag)
+        
+        body, headers = await self.get_or_build(key, build, version)
+        return Response(content=body, media_type="application/json", headers={**headers, "ETag": etag})
+
+
+def dump_json(adapter: TypeAdapter, objects) -> bytes:
+    """Validate ORM objects through the response schema (like response_model does), then serialize."""
+    return adapter.dump_json(adapter.validate_python(objects, from_attributes=True))
+
+
+def cache_key(name: str, **params: Optional[object]) -> str:
+    return name + "?" + "&".join(f"{k}={v}" for k, v in sorted(params.items()) if v is not None)
+
+
+catalog_cache = CatalogCache()
+
+
+async def get_catalog_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Read session for endpoints served through catalog_cache.respond(): the replica,
+    unless the last catalog bump is too recent for it to have been replayed there.
+    Never write through this session.
+    """
+    version, bumped_at = await catalog_cache.version_info()
+    request.state.catalog_version = version
+    session_factory = await read_session_factory(written_at=bumped_at)
+    async with session_factory() as session:
+        yield session
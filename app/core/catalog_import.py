@@ -0,0 +1,225 @@
+# app/core/catalog_import.py
+import codecs
+import csv
+import json
+from typing import AsyncIterator, Iterator, Optional
+
+from pydantic import ValidationError
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.inventory import refresh_product_summaries
+from app.models.product import Category
+from app.schemas.product import ProductImportRow, ImportReport, ImportRowError
+
+# Bulk catalog import: streamed NDJSON/CSV -> validated batches -> COPY into a
+# temp staging table -> set-based upsert by SKU into products / product_variants.
+# Only one batch is held in memory at a time, whatever the size of the upload.
+
+IMPORT_BATCH_SIZE = 5000
+IMPORT_MAX_REPORTED_ERRORS = 1000
+
+STAGING_TABLE = "product_import_staging"
+STAGING_COLUMNS = [
+    "line", "product_sku", "name", "description", "category_id", "is_active",
+    "sku", "price", "inventory_count", "attributes",
+]
+
+# ON COMMIT DELETE ROWS: every batch commits, which empties the staging table for the next one
+CREATE_STAGING_SQL = text(f"""
+    CREATE TEMP TABLE IF NOT EXISTS {STAGING_TABLE} (
+        line INTEGER NOT NULL,
+        product_sku VARCHAR(50) NOT NULL,
+        name VARCHAR(255) NOT NULL,
+        description TEXT,
+        category_id UUID NOT NULL,
+        is_active BOOLEAN NOT NULL,
+        sku VARCHAR(50) NOT NULL,
+        price NUMERIC(10, 2) NOT NULL,
+        inventory_count INTEGER NOT NULL,
+        attributes TEXT NOT NULL
+    ) ON COMMIT DELETE ROWS
+""")
+
+# DISTINCT ON keeps the last row per SKU, so duplicates inside a batch don't make
+# ON CONFLICT touch the same row twice
+UPSERT_PRODUCTS_SQL = text(f"""
+    INSERT INTO products (id, sku, name, description, category_id, is_active)
+    SELECT DISTINCT ON (product_sku) gen_random_uuid(), product_sku, name, description, category_id, is_active
+    FROM {STAGING_TABLE}
+    ORDER BY product_sku, line DESC
+    ON CONFLICT (sku) DO UPDATE SET
+        name = EXCLUDED.name,
+        description = EXCLUDED.description,
+        category_id = EXCLUDED.category_id,
+        is_active = EXCLUDED.is_active
+""")
+
+UPSERT_VARIANTS_SQL = text(f"""
+    INSERT INTO product_variants (id, product_id, sku, price, inventory_count, attributes)
+    SELECT DISTINCT ON (s.sku) gen_random_uuid(), p.id, s.sku, s.price, s.inventory_count, s.attributes::jsonb
+    FROM {STAGING_TABLE} s
+    JOIN products p ON p.sku = s.product_sku
+    ORDER BY s.sku, s.line DESC
+    ON CONFLICT (sku) DO UPDATE SET
+        product_id = EXCLUDED.product_id,
+        price = EXCLUDED.price,
+        inventory_count = EXCLUDED.inventory_count,
+        attributes = EXCLUDED.attributes
+""")
+
+# Same lock order as app/core/inventory.py (variants by id, then products by id):
+# lock the existing rows the batch will touch before upserting, so an import running
+# next to checkouts and stock updates queues behind them instead of deadlocking.
+# The products are the existing owners of batch SKUs plus the current owners of
+# batch variant SKUs (a variant can move to another product).
+LOCK_BATCH_VARIANTS_SQL = text(f"""
+    SELECT pv.id FROM product_variants pv
+    WHERE pv.sku IN (SELECT sku FROM {STAGING_TABLE})
+    ORDER BY pv.id
+    FOR UPDATE
+""")
+
+LOCK_BATCH_PRODUCTS_SQL = text(f"""
+    SELECT p.id FROM products p
+    WHERE p.sku IN (SELECT product_sku FROM {STAGING_TABLE})
+       OR p.id IN (SELECT pv.product_id FROM product_variants pv JOIN {STAGING_TABLE} s ON s.sku = pv.sku)
+    ORDER BY p.id
+    FOR UPDATE
+""")
+
+# Products whose summaries (min/max price, total inventory) the batch can change:
+# the upserted products plus the current owners of upserted variant SKUs
+# (a variant can move to another product). Run before the variant upsert.
+AFFECTED_PRODUCTS_SQL = text(f"""
+    SELECT p.id FROM products p WHERE p.sku IN (SELECT product_sku FROM {STAGING_TABLE})
+    UNION
+    SELECT pv.product_id FROM product_variants pv JOIN {STAGING_TABLE} s ON s.sku = pv.sku
+""")
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Split a byte stream into text lines without buffering more than one partial line."""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending.strip():
+        yield pending.rstrip("\r")
+
+
+class CatalogImporter:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.report = ImportReport()
+        self._known_categories: set = set()
+        self._batch: list[tuple[int, ProductImportRow]] = []
+
+    def _error(self, line: int, error: str) -> None:
+        self.report.failed += 1
+        if len(self.report.errors) < IMPORT_MAX_REPORTED_ERRORS:
+            self.report.errors.append(ImportRowError(line=line, error=error))
+        else:
+            self.report.errors_truncated = True
+
+    def _parse(self, line_no: int, data: Optional[dict]) -> None:
+        self.report.rows += 1
+        try:
+            if not isinstance(data, dict):
+                raise ValueError("row must be an object")
+            self._batch.append((line_no, ProductImportRow.model_validate(data)))
+        except ValidationError as e:
+            self._error(line_no, "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()))
+        except ValueError as e:
+            self._error(line_no, str(e))
+
+    def _parse_ndjson(self, line_no: int, line: str) -> None:
+        try:
+            data = json.loads(line)
+        except ValueError as e:
+            self.report.rows += 1
+            self._error(line_no, f"invalid JSON: {e}")
+            return
+        self._parse(line_no, data)
+
+    async def run(self, chunks: AsyncIterator[bytes], import_format: str) -> ImportReport:
+        header: Optional[list[str]] = None
+        line_no = 0
+        async for line in iter_lines(chunks):
+            line_no += 1
+            if not line.strip():
+                continue
+            if import_format == "csv":
+                # One record per physical line (quoted fields may not contain newlines)
+                values = next(csv.reader([line]))
+                if header is None:
+                    header = values
+                    continue
+                self._parse(line_no, dict(zip(header, values)))
+            else:
+                self._parse_ndjson(line_no, line)
+            
+            if len(self._batch) >= IMPORT_BATCH_SIZE:
+                await self._flush()
+        await self._flush()
+        return self.report
+
+    async def _check_categories(self) -> None:
+        unknown = {row.category_id for _, row in self._batch} - self._known_categories
+        if unknown:
+            result = await self.db.execute(select(Category.id).filter(Category.id.in_(unknown)))
+            self._known_categories.update(result.scalars().all())
+        
+        valid = []
+        for line_no, row in self._batch:
+            if row.category_id in self._known_categories:
+                valid.append((line_no, row))
+            else:
+                self._error(line_no, f"category {row.category_id} not found")
+        self._batch = valid
+
+    async def _flush(self) -> None:
+        if not self._batch:
+            return
+        batch_size = 0
+        try:
+            await self._check_categories()
+            batch_size = len(self._batch)
+            if not batch_size:
+                return
+            
+            # Creating the temp table also opens the transaction on this connection,
+            # so the raw COPY below runs inside it
+            await self.db.execute(CREATE_STAGING_SQL)
+            connection = await self.db.connection()
+            raw_connection = await connection.get_raw_connection()
+            await raw_connection.driver_connection.copy_records_to_table(
+                STAGING_TABLE,
+                columns=STAGING_COLUMNS,
+                records=[
+                    (
+                        line_no, row.product_sku, row.name, row.description, row.category_id, row.is_active,
+                        row.sku, row.price, row.inventory_count, json.dumps(row.attributes),
+                    )
+                    for line_no, row in self._batch
+                ],
+            )
+            await self.db.execute(LOCK_BATCH_VARIANTS_SQL)
+            await self.db.execute(LOCK_BATCH_PRODUCTS_SQL)
+            await self.db.execute(UPSERT_PRODUCTS_SQL)
+            affected = (await self.db.execute(AFFECTED_PRODUCTS_SQL)).scalars().all()
+            await self.db.execute(UPSERT_VARIANTS_SQL)
+            await refresh_product_summaries(self.db, affected)
+            await self.db.commit()
+            self.report.imported += batch_size
+        except Exception as e:
+            # A database error fails the whole batch; report it against each row
+            await self.db.rollback()
+            for line_no, _ in self._batch:
+                self._error(line_no, f"batch failed: {e}")
+        finally:
+            self._batch = []
@@ -0,0 +1,104 @@
+# app/core/etag.py
+import hashlib
+import time
+import uuid
+from collections import OrderedDict
+from typing import Optional
+
+from fastapi import Response
+
+from app.config import get_settings
+
+settings = get_settings()
+
+# Random per-process prefix for locally versioned ETags. Local counters restart at
+# zero on every deploy; the epoch makes sure an old ETag can never match again.
+PROCESS_EPOCH = uuid.uuid4().hex[:8]
+
+def make_etag(*parts: object) -> str:
+    """Strong ETag from version parts; request params are hashed to keep it short."""
+    *versions, params = parts
+    digest = hashlib.sha1(str(params).encode()).hexdigest()[:12]
+    return '"' + "-".join(str(p) for p in versions) + "-" + digest + '"'
+
+def time_bucket(seconds: int) -> int:
+    """Changes every `seconds`: put in an ETag to bound how long it stays valid."""
+    return int(time.time() // max(seconds, 1))
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison, so W/"x" matches "x"
+    candidates = (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+    return etag in candidates
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag})
+
+
+class OrderVersions:
+    """
+    Per-user order-list version, bumped whenever one of the user's orders changes.
+
+    Local mode keeps a bounded map. Users without an entry report `_floor`, which is
+    raised to the newest version handed out whenever an entry is evicted, so a
+    version is never reused for different data (eviction only costs a cache miss).
+    Local versions only see this worker's bumps, so they also change every
+    ORDER_ETAG_LOCAL_TTL_SECONDS to bound how long another worker's write can be
+    answered with 304. With ORDER_ETAG_REDIS the versions live in a Redis hash
+    shared by all workers.
+
+    Each version also carries the time of its bump, so readers can stay off a
+    replica that may not have replayed that write yet.
+    """
+
+    REDIS_KEY = "orders:versions"
+    REDIS_BUMPED_AT_KEY = "orders:bumped_at"
+
+    def __init__(self, max_users: int = 100_000):
+        self.max_users = max_users
+        self._versions: "OrderedDict[str, tuple[int, float]]" = OrderedDict() # user -> (version, bumped_at)
+        self._counter = 0
+        self._floor = (0, 0.0)
+        self._redis = None
+        if settings.ORDER_ETAG_REDIS:
+            from app.redis_client import redis_client # Optional dependency
+            self._redis = redis_client
+
+    async def get(self, user_id) -> tuple[str, float]:
+        """(version string for the user's ETag, time.time() of the bump behind it)."""
+        user_id = str(user_id)
+        if self._redis is not None:
+            try:
+                async with self._redis.pipeline(transaction=False) as pipe:
+                    pipe.hget(self.REDIS_KEY, user_id)
+                    pipe.hget(self.REDIS_BUMPED_AT_KEY, user_id)
+                    version, bumped_at = await pipe.execute()
+                return f"r{int(version or 0)}", float(bumped_at or 0)
+            except Exception as e:
+                print(f"❌ Order versions: Redis unavailable, using local version: {e}")
+        version, bumped_at = self._versions.get(user_id, self._floor)
+        return f"{PROCESS_EPOCH}.{version}.{time_bucket(settings.ORDER_ETAG_LOCAL_TTL_SECONDS)}", bumped_at
+
+    async def bump(self, user_id) -> None:
+        user_id = str(user_id)
+        now = time.time()
+        self._counter += 1
+        self._versions[user_id] = (self._counter, now)
+        self._versions.move_to_end(user_id)
+        while len(self._versions) > self.max_users:
+            _, (_, evicted_bumped_at) = self._versions.popitem(last=False)
+            self._floor = (self._counter, max(self._floor[1], evicted_bumped_at))
+        if self._redis is not None:
+            try:
+                async with self._redis.pipeline(transaction=True) as pipe:
+                    pipe.hincrby(self.REDIS_KEY, user_id, 1)
+                    pipe.hset(self.REDIS_BUMPED_AT_KEY, user_id, now)
+                    await pipe.execute()
+            except Exception as e:
+                print(f"❌ Order versions: failed to bump Redis version: {e}")
+
+
+order_versions = OrderVersions()
@@ -0,0 +1,123 @@
+# app/core/fast_json.py
+import json
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Iterable
+
+from sqlalchemy import select, func, cast, Text, literal_column
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+
+from app.models.order import Order, OrderItem
+from app.models.product import Product, ProductVariant
+
+# Fast path for hot list endpoints: select plain columns (no ORM objects), let Postgres
+# aggregate the nested lists with json_agg, and encode the page in one pass without
+# Pydantic validation. The output matches ProductResponse / OrderResponse field for
+# field (same key order, Decimals as strings); nested lists come back ordered by id.
+# Only use it for trusted DB rows; anything user-supplied still goes through schemas.
+
+try:
+    import orjson # Optional dependency, noticeably faster than the stdlib encoder
+except ImportError:
+    orjson = None
+
+# orjson >= 3.9 can embed the JSON text Postgres built without re-parsing it
+_Fragment = getattr(orjson, "Fragment", None)
+
+
+def _default(value: Any) -> Any:
+    # Same representation Pydantic uses in JSON mode
+    if isinstance(value, (uuid.UUID, Decimal)):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(value: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value, default=_default)
+    return json.dumps(value, default=_default, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def raw_json(text: str) -> Any:
+    """Embed a JSON document built by Postgres (json_agg) into the payload."""
+    return _Fragment(text) if _Fragment is not None else json.loads(text)
+
+
+def _json_list(obj, order_by, correlate_to, where):
+    """coalesce(json_agg(obj ORDER BY ...), '[]') as text, correlated to the outer row."""
+    return (
+        select(cast(func.coalesce(func.json_agg(aggregate_order_by(obj, order_by)), literal_column("'[]'::json")), Text))
+        .where(where)
+        .correlate(correlate_to)
+        .scalar_subquery()
+    )
+
+
+# --- Products (ProductResponse) ---
+VARIANT_JSON = func.json_build_object(
+    literal_column("'sku'"), ProductVariant.sku,
+    literal_column("'price'"), cast(ProductVariant.price, Text), # Decimal -> "19.99", like Pydantic
+    literal_column("'inventory_count'"), ProductVariant.inventory_count,
+    literal_column("'attributes'"), ProductVariant.attributes,
+    literal_column("'id'"), ProductVariant.id,
+    literal_column("'product_id'"), ProductVariant.product_id,
+)
+
+def product_rows_statement():
+    """select() of the columns products_json() needs; add filters/order/limit as usual."""
+    variants = _json_list(VARIANT_JSON, ProductVariant.id, Product, ProductVariant.product_id == Product.id)
+    return select(
+        Product.name, Product.description, Product.category_id, Product.is_active, Product.id,
+        variants.label("variants_json"),
+    )
+
+def product_objects(rows: Iterable) -> list:
+    """Rows -> JSON-ready ProductResponse dicts (for payloads that nest product lists)."""
+    return [
+        {
+            "name": row.name,
+            "description": row.description,
+            "category_id": row.category_id,
+            "is_active": row.is_active,
+            "id": row.id,
+            "variants": raw_json(row.variants_json),
+        }
+        for row in rows
+    ]
+
+def products_json(rows: Iterable) -> bytes:
+    return dumps(product_objects(rows))
+
+
+# --- Orders (OrderResponse) ---
+ORDER_ITEM_JSON = func.json_build_object(
+    literal_column("'id'"), OrderItem.id,
+    literal_column("'variant_id'"), OrderItem.variant_id,
+    literal_column("'quantity'"), OrderItem.quantity,
+    literal_column("'unit_price'"), cast(OrderItem.unit_price, Text),
+)
+
+def order_rows_statement():
+    items = _json_list(ORDER_ITEM_JSON, OrderItem.id, Order, OrderItem.order_id == Order.id)
+    return select(
+        Order.id, Order.user_id, Order.total_amount, Order.status, Order.created_at,
+        items.label("items_json"),
+    )
+
+def orders_json(rows: Iterable) -> bytes:
+    return dumps([
+        {
+            "id": row.id,
+            "user_id": row.user_id,
+            "total_amount": row.total_amount,
+            "status": row.status,
+            "items": raw_json(row.items_json),
+        }
+        for row in rows
+    ])
@@ -0,0 +1,154 @@
+# app/core/inventory.py
+import uuid
+from typing import Sequence
+
+from sqlalchemy import text, bindparam, Integer, Uuid
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Set-based inventory writes.
+# Input rows arrive as two arrays (unnest), which is the same relation as a VALUES
+# list but costs two bind parameters instead of two per row, so large batches stay
+# under the driver's parameter limit. Rows are locked in variant id order in every
+# statement here: two writers touching overlapping variants queue behind each other
+# instead of deadlocking.
+
+# Upper bound on rows per statement (keeps lock hold times and RETURNING sets modest)
+STOCK_BATCH_CHUNK_SIZE = 5000
+
+SET_STOCK_SQL = text("""
+    WITH input AS (
+        SELECT * FROM unnest(CAST(:variant_ids AS UUID[]), CAST(:stocks AS INTEGER[])) AS v(id, stock)
+    ),
+    locked AS (
+        SELECT pv.id, pv.inventory_count AS old_stock, input.stock
+        FROM product_variants pv
+        JOIN input ON input.id = pv.id
+        ORDER BY pv.id
+        FOR UPDATE OF pv
+    )
+    UPDATE product_variants pv
+    SET inventory_count = locked.stock
+    FROM locked
+    WHERE pv.id = locked.id
+    RETURNING pv.id, pv.product_id, pv.sku, locked.old_stock, pv.inventory_count AS new_stock
+""").bindparams(
+    bindparam("variant_ids", type_=ARRAY(Uuid)),
+    bindparam("stocks", type_=ARRAY(Integer)),
+)
+
+async def set_stock_levels(db: AsyncSession, stock_by_variant: dict[uuid.UUID, int]) -> list:
+    """
+    Overwrite inventory_count for many variants. Returns one row per updated variant
+    (id, product_id, sku, old_stock, new_stock); ids that don't exist are simply absent.
+    Does not commit.
+    """
+    variant_ids: Sequence[uuid.UUID] = sorted(stock_by_variant)
+    rows = []
+    # Chunks are taken in id order too, so the global lock order is preserved
+    for start in range(0, len(variant_ids), STOCK_BATCH_CHUNK_SIZE):
+        chunk = variant_ids[start:start + STOCK_BATCH_CHUNK_SIZE]
+        result = await db.execute(
+            SET_STOCK_SQL,
+            {"variant_ids": list(chunk), "stocks": [stock_by_variant[v] for v in chunk]},
+        )
+        rows.extend(result.all())
+    return rows
+
+# --- Product summaries (min_price / max_price / total_inventory on products) ---
+# Stock-only changes apply a delta to total_inventory: deltas commute, so concurrent
+# writers never overwrite each other's totals. Anything that can change prices or
+# move variants recomputes the summary from the variants instead.
+
+ADJUST_TOTAL_INVENTORY_SQL = text("""
+    WITH input AS (
+        SELECT * FROM unnest(CAST(:product_ids AS UUID[]), CAST(:deltas AS INTEGER[])) AS v(id, delta)
+    ),
+    locked AS (
+        SELECT p.id, input.delta
+        FROM products p
+        JOIN input ON input.id = p.id
+        ORDER BY p.id
+        FOR UPDATE OF p
+    )
+    UPDATE products p
+    SET total_inventory = p.total_inventory + locked.delta
+    FROM locked
+    WHERE p.id = locked.id
+""").bindparams(
+    bindparam("product_ids", type_=ARRAY(Uuid)),
+    bindparam("deltas", type_=ARRAY(Integer)),
+)
+
+REFRESH_SUMMARIES_SQL = text("""
+    UPDATE products p
+    SET min_price = s.min_price, max_price = s.max_price, total_inventory = s.total_inventory
+    FROM (
+        SELECT p2.id, min(pv.price) AS min_price, max(pv.price) AS max_price,
+               coalesce(sum(pv.inventory_count), 0) AS total_inventory
+        FROM products p2
+        LEFT JOIN product_variants pv ON pv.product_id = p2.id
+        WHERE p2.id = ANY(:product_ids)
+        GROUP BY p2.id
+    ) s
+    WHERE p.id = s.id
+""").bindparams(bindparam("product_ids", type_=ARRAY(Uuid)))
+
+async def adjust_total_inventory(db: AsyncSession, deltas: dict[uuid.UUID, int]) -> None:
+    """Add per-product stock deltas to products.total_inventory. Does not commit."""
+    deltas = {product_id: delta for product_id, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    product_ids = sorted(deltas)
+    await db.execute(
+        ADJUST_TOTAL_INVENTORY_SQL,
+        {"product_ids": product_ids, "deltas": [deltas[p] for p in product_ids]},
+    )
+
+async def refresh_product_summaries(db: AsyncSession, product_ids) -> None:
+    """Recompute min/max price and total inventory from the variants. Does not commit."""
+    product_ids = sorted(set(product_ids))
+    if product_ids:
+        await db.execute(REFRESH_SUMMARIES_SQL, {"product_ids": product_ids})
+
+# --- Checkout reservation ---
+# One conditional UPDATE takes the stock for a whole cart: rows are locked in id order
+# and only decremented where enough is left, so the check and the decrement happen
+# under the same lock and stock can't go negative. Variants missing from RETURNING
+# are the shortfalls (not enough stock, or the variant no longer exists).
+
+RESERVE_STOCK_SQL = text("""
+    WITH input AS (
+        SELECT * FROM unnest(CAST(:variant_ids AS UUID[]), CAST(:quantities AS INTEGER[])) AS v(id, qty)
+    ),
+    locked AS (
+        SELECT pv.id, input.qty
+        FROM product_variants pv
+        JOIN input ON input.id = pv.id
+        ORDER BY pv.id
+        FOR UPDATE OF pv
+    )
+    UPDATE product_variants pv
+    SET inventory_count = pv.inventory_count - locked.qty
+    FROM locked
+    WHERE pv.id = locked.id AND pv.inventory_count >= locked.qty
+    RETURNING pv.id, pv.product_id, pv.sku, pv.price, pv.inventory_count AS new_stock
+""").bindparams(
+    bindparam("variant_ids", type_=ARRAY(Uuid)),
+    bindparam("quantities", type_=ARRAY(Integer)),
+)
+
+async def reserve_stock(db: AsyncSession, quantities: dict[uuid.UUID, int]) -> dict:
+    """
+    Decrement inventory_count by the requested quantities where the stock covers them.
+    Returns {variant_id: row (id, product_id, sku, price, new_stock)} for the variants
+    that were decremented. If any requested variant is missing from the result, the
+    caller must roll back (the other rows stay decremented and locked until then).
+    Does not commit.
+    """
+    variant_ids = sorted(quantities)
+    result = await db.execute(
+        RESERVE_STOCK_SQL,
+        {"variant_ids": variant_ids, "quantities": [quantities[v] for v in variant_ids]},
+    )
+    return {row.id: row for row in result.all()}
@@ -0,0 +1,31 @@
+# app/core/pagination.py
+import base64
+import json
+from typing import Any, Callable
+
+from fastapi import HTTPException
+
+# Keyset (cursor) pagination helpers.
+# A cursor is the sort key of the last row on the previous page, e.g. (name, id),
+# packed into an opaque URL-safe token. The next page is "rows after that key",
+# which the composite index can seek to directly, so page 1000 costs the same as page 1.
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(*values: Any) -> str:
+    raw = json.dumps([str(v) for v in values], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str, *parsers: Callable[[str], Any]) -> tuple:
+    """
+    Decode a cursor and convert each part with the matching parser
+    (e.g. decode_cursor(c, str, uuid.UUID)). Raises 400 on anything malformed.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(parsers):
+            raise ValueError("wrong cursor arity")
+        return tuple(parse(value) for parse, value in zip(parsers, values))
+    except (ValueError, TypeError, ArithmeticError): # ArithmeticError: bad Decimal
+        raise HTTPException(status_code=400, detail="Invalid cursor")
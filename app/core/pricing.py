@@ -0,0 +1,52 @@
+# app/core/pricing.py
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Optional
+
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.coupon import Coupon, DiscountType
+
+# Coupon validation and discount math shared by checkout and the cart preview,
+# so the preview shows exactly what checkout will charge.
+
+async def get_valid_coupon(db: AsyncSession, code: str) -> Coupon:
+    """Look up a coupon by code (case-insensitive); 404/400 if it can't be used."""
+    result = await db.execute(select(Coupon).filter(Coupon.code == code.upper()))
+    coupon = result.scalar_one_or_none()
+    
+    if not coupon:
+        raise HTTPException(status_code=404, detail="Invalid coupon code")
+        
+    if not coupon.is_active:
+        raise HTTPException(status_code=400, detail="Coupon is inactive")
+        
+    if coupon.max_uses and coupon.usage_count >= coupon.max_uses:
+        raise HTTPException(status_code=400, detail="Coupon usage limit reached")
+    
+    return coupon
+
+CENT = Decimal("0.01")
+
+def apply_discount(subtotal: Decimal, coupon: Optional[Coupon]) -> tuple[Decimal, Decimal]:
+    """
+    Returns (discount_amount, total). The discount is rounded to cents here, so the
+    preview shows exactly the total that is stored on the order (Numeric(10, 2)).
+    """
+    if not coupon:
+        return Decimal("0.00"), subtotal
+    
+    if coupon.discount_type == DiscountType.PERCENTAGE:
+        # Calculate percentage
+        discount_amount = (subtotal * (coupon.value / Decimal("100"))).quantize(CENT, rounding=ROUND_HALF_UP)
+    else:
+        # Fixed amount
+        discount_amount = coupon.value
+    
+    total = subtotal - discount_amount
+    
+    # Ensure total doesn't go negative (unless we want free items, which is fine)
+    if total < 0:
+        total = Decimal("0.00")
+    return discount_amount, total
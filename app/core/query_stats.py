@@ -0,0 +1,77 @@
+# app/core/query_stats.py
+import logging
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from app.config import get_settings
+
+logger = logging.getLogger("app.db.query_stats")
+
+class QueryStats:
+    """
+    SQL statements, DB time and rows for one unit of work (usually one request).
+    Filled in by the cursor-execute hooks in app/database.py. Scopes nest: a
+    statement is counted in the innermost scope and every scope around it.
+    """
+
+    def __init__(self, parent: Optional["QueryStats"] = None):
+        self.parent = parent
+        self.count = 0
+        self.duration_ms = 0.0
+        self.rows = 0
+        self.statements: Counter = Counter()
+
+    def record(self, statement: str, elapsed_ms: float, rowcount: int) -> None:
+        self.count += 1
+        self.duration_ms += elapsed_ms
+        if rowcount and rowcount > 0:
+            self.rows += rowcount
+        self.statements[statement] += 1
+
+    def repeated_statements(self, threshold: int) -> list[tuple[str, int]]:
+        """Statements run more than `threshold` times: the usual N+1 signature."""
+        return [(stmt, n) for stmt, n in self.statements.most_common() if n > threshold]
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.duration_ms:.2f};desc="{self.count} queries, {self.rows} rows"'
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+def record_query(statement: str, elapsed_ms: float, rowcount: int) -> None:
+    stats = _current_stats.get()
+    while stats is not None:
+        stats.record(statement, elapsed_ms, rowcount)
+        stats = stats.parent
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Collect stats for every statement executed inside the block (same task / context)."""
+    stats = QueryStats(parent=_current_stats.get()) # e.g. the request middleware inside assert_max_queries
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+def warn_on_n_plus_one(stats: QueryStats, label: str) -> None:
+    for statement, times in stats.repeated_statements(get_settings().N_PLUS_ONE_THRESHOLD):
+        logger.warning("Possible N+1 in %s: statement ran %d times: %s", label, times, statement)
+
+@contextmanager
+def assert_max_queries(max_queries: int) -> Iterator[QueryStats]:
+    """
+    Test helper: fail if the block issues more than `max_queries` statements.
+
+        with assert_max_queries(8):
+            await client.post("/api/v1/orders/checkout", ...)
+
+    Works with an in-process client (httpx ASGITransport / TestClient in the same
+    thread); the statements are listed in the failure message.
+    """
+    with track_queries() as stats:
+        yield stats
+    if stats.count > max_queries:
+        listing = "\n".join(f"  {n}x {stmt}" for stmt, n in stats.statements.most_common())
+        raise AssertionError(f"Expected at most {max_queries} queries, got {stats.count}:\n{listing}")
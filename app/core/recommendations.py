@@ -0,0 +1,68 @@
+# app/core/recommendations.py
+import asyncio
+import uuid
+
+from sqlalchemy import select, func
+
+from app.config import get_settings
+from app.database import read_session_factory
+from app.models.recommendation import ProductNeighbor, RecommendationBuild
+
+settings = get_settings()
+
+NEIGHBOR_LOAD_BATCH_SIZE = 50_000
+
+
+class NeighborIndex:
+    """
+    In-memory snapshot of the co-purchase neighbor table (product_id -> ranked neighbor ids).
+
+    Lookups are a dict access: no DB round trip. The snapshot is reloaded only when
+    build_recommendations.py has recorded a newer build, and is swapped in whole, so
+    readers never see a half-loaded index.
+    """
+
+    def __init__(self):
+        self._neighbors: dict[uuid.UUID, tuple[uuid.UUID, ...]] = {}
+        self.build_id: int = 0 # 0 = nothing loaded yet
+
+    def get(self, product_id: uuid.UUID) -> tuple[uuid.UUID, ...]:
+        return self._neighbors.get(product_id, ())
+
+    def __len__(self) -> int:
+        return len(self._neighbors)
+
+    async def refresh(self) -> bool:
+        """Load the latest build if it is newer than the current snapshot. Returns True if reloaded."""
+        session_factory = await read_session_factory() # Replica only while it is caught up
+        async with session_factory() as db:
+            latest = (await db.execute(select(func.max(RecommendationBuild.id)))).scalar()
+            if latest is None or latest == self.build_id:
+                return False
+            
+            neighbors: dict[uuid.UUID, list[uuid.UUID]] = {}
+            result = await db.stream(
+                select(ProductNeighbor.product_id, ProductNeighbor.neighbor_id)
+                .order_by(ProductNeighbor.product_id, ProductNeighbor.rank)
+                .execution_options(yield_per=NEIGHBOR_LOAD_BATCH_SIZE)
+            )
+            async for product_id, neighbor_id in result:
+                neighbors.setdefault(product_id, []).append(neighbor_id)
+        
+        self._neighbors = {product_id: tuple(ids) for product_id, ids in neighbors.items()}
+        self.build_id = latest
+        print(f"✅ Recommendations: loaded build {latest} ({len(self._neighbors)} products)")
+        return True
+
+    async def run_refresh_loop(self) -> None:
+        """Background task: pick up new builds without a restart."""
+        while True:
+            await asyncio.sleep(settings.RECOMMENDATIONS_REFRESH_SECONDS)
+            try:
+                await self.refresh()
+            except Exception as e:
+                # Keep serving from the last good snapshot
+                print(f"❌ Recommendations refresh failed: {e}")
+
+
+neighbor_index = NeighborIndex()
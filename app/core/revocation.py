@@ -0,0 +1,94 @@
+# app/core/revocation.py
+import asyncio
+import hashlib
+from typing import Iterable, Optional
+
+from sqlalchemy import select, or_
+
+from app.config import get_settings
+from app.database import AsyncSessionLocal
+from app.models.user import User
+
+settings = get_settings()
+
+
+class BloomFilter:
+    """
+    Fixed-size bloom filter over string keys.
+    Answers "definitely not present" or "maybe present" in O(k).
+    """
+
+    def __init__(self, capacity: int, hash_count: int = 4, bits_per_item: int = 10):
+        self.size = max(capacity * bits_per_item, 1024)
+        self.hash_count = hash_count
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode(), digest_size=8 * self.hash_count).digest()
+        for i in range(self.hash_count):
+            yield int.from_bytes(digest[i * 8:(i + 1) * 8], "little") % self.size
+
+    def add(self, key: str) -> None:
+        for pos in self._positions(key):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+class RevocationList:
+    """
+    In-memory view of users whose older tokens must be rejected in stateless mode.
+
+    Only users that ever had a token bumped (token_version > 0) or were deactivated
+    are tracked, so the set stays small. The bloom filter makes the common case
+    (user never revoked) a couple of hash lookups; the exact dict settles the rest.
+    """
+
+    def __init__(self):
+        self._entries: dict[str, tuple[int, bool]] = {} # user_id -> (token_version, is_active)
+        self._bloom = BloomFilter(capacity=1024)
+
+    def replace(self, rows: Iterable[tuple[str, int, bool]]) -> None:
+        entries = {str(user_id): (version, is_active) for user_id, version, is_active in rows}
+        bloom = BloomFilter(capacity=max(len(entries) * 2, 1024))
+        for user_id in entries:
+            bloom.add(user_id)
+        # Swap both at once so readers never see a half-built filter
+        self._entries, self._bloom = entries, bloom
+
+    def record(self, user_id, token_version: int, is_active: bool) -> None:
+        """Apply a local change immediately, without waiting for the next refresh."""
+        user_id = str(user_id)
+        self._entries[user_id] = (token_version, is_active)
+        self._bloom.add(user_id)
+
+    def is_revoked(self, user_id: str, token_version: int) -> bool:
+        if user_id not in self._bloom:
+            return False
+        entry: Optional[tuple[int, bool]] = self._entries.get(user_id)
+        if entry is None:
+            return False # Bloom false positive
+        current_version, is_active = entry
+        return not is_active or token_version < current_version
+
+    async def refresh(self) -> None:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(User.id, User.token_version, User.is_active)
+                .filter(or_(User.token_version > 0, User.is_active.is_(False)))
+            )
+            self.replace(result.all())
+
+    async def run_refresh_loop(self) -> None:
+        """Background task: re-sync with the DB so other workers' revocations apply here too."""
+        while True:
+            await asyncio.sleep(settings.AUTH_REVOCATION_REFRESH_SECONDS)
+            try:
+                await self.refresh()
+            except Exception as e:
+                # Keep serving from the last good snapshot
+                print(f"❌ Revocation list refresh failed: {e}")
+
+
+revocation_list = RevocationList()
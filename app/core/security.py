@@ -1,6 +1,9 @@
 # app/core/security.py
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Union, Any
+from fastapi import HTTPException, status
 from jose import jwt
 from passlib.context import CryptContext
 from app.config import get_settings
@@ -9,13 +12,43 @@ settings = get_settings()
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
-def create_access_token(subject: Union[str, Any], expires_delta: timedelta = None) -> str:
+# --- Password Hashing Pool ---
+# bcrypt is deliberately slow (~100-300 ms per call). Running it inline in an async
+# handler blocks the event loop for every other request on the worker, so async
+# callers go through this small dedicated pool instead (bcrypt releases the GIL).
+# Once PASSWORD_HASH_MAX_PENDING jobs are queued or running we shed load with 503
+# rather than letting logins pile up behind each other.
+_hash_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="pwd-hash",
+)
+_hash_pending = 0
+
+async def _run_in_hash_pool(func, *args):
+    global _hash_pending
+    if _hash_pending >= settings.PASSWORD_HASH_MAX_PENDING:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Authentication service is busy, please retry shortly",
+            headers={"Retry-After": "1"},
+        )
+    _hash_pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_hash_executor, func, *args)
+    finally:
+        _hash_pending -= 1
+
+def create_access_token(subject: Union[str, Any], expires_delta: timedelta = None, claims: dict = None) -> str:
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     
     to_encode = {"exp": expire, "sub": str(subject)}
+    if claims:
+        # Extra claims (e.g. role / active / ver for stateless-claims mode)
+        to_encode.update(claims)
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
@@ -23,4 +56,14 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
\ No newline at end of file
+    return pwd_context.hash(password)
+
+# Async variants for request handlers (never call the sync ones from async code)
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_in_hash_pool(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    return await _run_in_hash_pool(get_password_hash, password)
+
+def shutdown_hash_pool() -> None:
+    _hash_executor.shutdown(wait=False, cancel_futures=True)
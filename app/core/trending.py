@@ -0,0 +1,141 @@
+# app/core/trending.py
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Optional
+
+from sqlalchemy import text, bindparam, Integer, Uuid, DateTime
+from sqlalchemy.dialects.postgresql import ARRAY
+
+from app.config import get_settings
+from app.database import AsyncSessionLocal
+from app.models.trending import ProductSalesBucket
+
+settings = get_settings()
+
+# Trending / bestsellers with time decay.
+# Checkout adds units sold to an in-memory counter keyed by (product, hour bucket).
+# Every TRENDING_FLUSH_SECONDS each worker adds its counters to product_sales_buckets
+# (additive upsert, so all workers' sales merge) and reloads the rankings: a bucket
+# counts quantity * 0.5 ^ (age / half-life), and the top N per category plus the
+# overall top N are kept in memory. Requests only do a dict lookup.
+
+FLUSH_SALES_SQL = text("""
+    INSERT INTO product_sales_buckets (product_id, bucket_start, quantity)
+    SELECT * FROM unnest(CAST(:product_ids AS UUID[]), CAST(:bucket_starts AS TIMESTAMP[]), CAST(:quantities AS INTEGER[]))
+    ORDER BY 1, 2
+    ON CONFLICT (product_id, bucket_start) DO UPDATE
+    SET quantity = product_sales_buckets.quantity + EXCLUDED.quantity
+""").bindparams(
+    bindparam("product_ids", type_=ARRAY(Uuid)),
+    bindparam("bucket_starts", type_=ARRAY(DateTime)),
+    bindparam("quantities", type_=ARRAY(Integer)),
+)
+
+PRUNE_SALES_SQL = text("DELETE FROM product_sales_buckets WHERE bucket_start < :before")
+
+# Inactive products are left out; category comes from the product, so moves apply immediately
+RANKINGS_SQL = text("""
+    WITH scores AS (
+        SELECT b.product_id, p.category_id,
+               sum(b.quantity * power(0.5, extract(epoch FROM (:now - b.bucket_start)) / 3600.0 / CAST(:half_life_hours AS DOUBLE PRECISION))) AS score
+        FROM product_sales_buckets b
+        JOIN products p ON p.id = b.product_id
+        WHERE b.bucket_start >= :since AND p.is_active
+        GROUP BY b.product_id, p.category_id
+    ),
+    ranked AS (
+        SELECT product_id, category_id, score,
+               row_number() OVER (PARTITION BY category_id ORDER BY score DESC, product_id) AS category_rank,
+               row_number() OVER (ORDER BY score DESC, product_id) AS overall_rank
+        FROM scores
+    )
+    SELECT product_id, category_id, score, category_rank, overall_rank
+    FROM ranked
+    WHERE category_rank <= :top_n OR overall_rank <= :top_n
+    ORDER BY score DESC, product_id
+""").bindparams(bindparam("now", type_=DateTime), bindparam("since", type_=DateTime))
+
+
+def current_bucket() -> datetime:
+    # Naive UTC, like the other timestamp columns
+    return datetime.now(timezone.utc).replace(tzinfo=None, minute=0, second=0, microsecond=0)
+
+
+class TrendingCounters:
+    """
+    Per-worker sales counters plus the latest rankings snapshot.
+    top() is a dict lookup; the snapshot is swapped in whole on every refresh.
+    """
+
+    def __init__(self):
+        self._pending: dict[tuple[uuid.UUID, datetime], int] = {} # (product_id, bucket) -> units
+        self._top: dict[Optional[uuid.UUID], tuple[uuid.UUID, ...]] = {} # category_id (None = all) -> product ids
+        self.version = 0 # Bumped on every reload; part of response cache keys
+
+    def record(self, sales: Iterable[tuple[uuid.UUID, int]]) -> None:
+        """Count units sold (product_id, quantity). Call after the order commits."""
+        bucket = current_bucket()
+        for product_id, quantity in sales:
+            key = (product_id, bucket)
+            self._pending[key] = self._pending.get(key, 0) + quantity
+
+    def top(self, category_id: Optional[uuid.UUID] = None) -> tuple[uuid.UUID, ...]:
+        return self._top.get(category_id, ())
+
+    async def flush(self) -> None:
+        """Add pending counters to Postgres and prune buckets that no longer count."""
+        pending, self._pending = self._pending, {}
+        keys = sorted(pending)
+        committed = False
+        try:
+            async with AsyncSessionLocal() as db:
+                if keys:
+                    await db.execute(FLUSH_SALES_SQL, {
+                        "product_ids": [product_id for product_id, _ in keys],
+                        "bucket_starts": [bucket for _, bucket in keys],
+                        "quantities": [pending[key] for key in keys],
+                    })
+                await db.execute(PRUNE_SALES_SQL, {"before": current_bucket() - timedelta(hours=settings.TRENDING_WINDOW_HOURS)})
+                await db.commit()
+                committed = True
+        finally:
+            if not committed:
+                # Failed or cancelled: keep the counts for the next attempt (plus whatever
+                # was recorded meanwhile)
+                for key, quantity in pending.items():
+                    self._pending[key] = self._pending.get(key, 0) + quantity
+
+    async def refresh(self) -> None:
+        now = current_bucket()
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(RANKINGS_SQL, {
+                "now": now,
+                "since": now - timedelta(hours=settings.TRENDING_WINDOW_HOURS),
+                "half_life_hours": settings.TRENDING_HALF_LIFE_HOURS,
+                "top_n": settings.TRENDING_TOP_N,
+            })
+            rows = result.all()
+        
+        top: dict[Optional[uuid.UUID], list[uuid.UUID]] = {}
+        for row in rows: # Best first
+            if row.category_rank <= settings.TRENDING_TOP_N:
+                top.setdefault(row.category_id, []).append(row.product_id)
+            if row.overall_rank <= settings.TRENDING_TOP_N:
+                top.setdefault(None, []).append(row.product_id)
+        self._top = {category_id: tuple(ids) for category_id, ids in top.items()}
+        self.version += 1
+
+    async def run_refresh_loop(self) -> None:
+        """Background task: flush this worker's counters, then reload the merged rankings."""
+        while True:
+            await asyncio.sleep(settings.TRENDING_FLUSH_SECONDS)
+            try:
+                await self.flush()
+                await self.refresh()
+            except Exception as e:
+                # Keep serving the last good rankings
+                print(f"❌ Trending refresh failed: {e}")
+
+
+trending = TrendingCounters()
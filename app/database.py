@@ -1,19 +1,202 @@
 # app/database.py
-from typing import AsyncGenerator  # 1. Import AsyncGenerator
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+import asyncio
+import logging
+import random
+import time
+from typing import AsyncGenerator, Optional  # 1. Import AsyncGenerator
+from sqlalchemy import event, text
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession, AsyncEngine
 from sqlalchemy.orm import DeclarativeBase
 from app.config import get_settings
+from app.core.query_stats import record_query
 
 settings = get_settings()
 
-engine = create_async_engine(settings.SQLALCHEMY_DATABASE_URI, echo=True)
+slow_query_logger = logging.getLogger("app.db.slow_query")
+
+# --- Pool Telemetry ---
+class PoolStats:
+    """
+    Counters for how long requests wait to get a connection out of the pool.
+    Lets us tell pool exhaustion (high wait) apart from slow queries.
+    """
+
+    def __init__(self):
+        self.engine: Optional[AsyncEngine] = None
+        self.checkouts = 0
+        self.wait_total_ms = 0.0
+        self.wait_max_ms = 0.0
+        self.slow_queries = 0
+
+    def record_wait(self, wait_ms: float) -> None:
+        self.checkouts += 1
+        self.wait_total_ms += wait_ms
+        if wait_ms > self.wait_max_ms:
+            self.wait_max_ms = wait_ms
+
+    def snapshot(self) -> dict:
+        pool = self.engine.pool
+        return {
+            "pool_size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": pool.overflow(),
+            "max_overflow": settings.DB_MAX_OVERFLOW,
+            "checkouts": self.checkouts,
+            "wait_avg_ms": round(self.wait_total_ms / self.checkouts, 3) if self.checkouts else 0.0,
+            "wait_max_ms": round(self.wait_max_ms, 3),
+            "slow_queries": self.slow_queries,
+        }
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waited for a connection."""
+
+    stats: PoolStats # Set per engine by _create_engine()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            self.stats.record_wait((time.perf_counter() - start) * 1000)
+
+# --- Slow Query Log (replaces echo=True) ---
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+def _make_after_cursor_execute(stats: PoolStats):
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed_ms = (time.perf_counter() - conn.info["query_start_time"].pop()) * 1000
+        # Per-request counters (Server-Timing header, N+1 detection, assert_max_queries)
+        record_query(statement, elapsed_ms, cursor.rowcount)
+        if elapsed_ms < settings.DB_SLOW_QUERY_MS:
+            return
+        stats.slow_queries += 1
+        # Sample so a slow period doesn't flood the logs
+        if random.random() < settings.DB_SLOW_QUERY_SAMPLE_RATE:
+            slow_query_logger.warning("Slow query (%.1f ms): %s", elapsed_ms, statement)
+    return _after_cursor_execute
+
+def _handle_error(exception_context):
+    # Failed statements never reach after_cursor_execute; drop their start time
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_start_time"):
+        conn.info["query_start_time"].pop()
+
+def _create_engine(uri: str, stats: PoolStats) -> AsyncEngine:
+    # A subclass per engine so each pool reports into its own stats
+    # (and pool.recreate() keeps using the same class).
+    pool_class = type("TimedQueuePool", (TimedQueuePool,), {"stats": stats})
+    new_engine = create_async_engine(
+        uri,
+        poolclass=pool_class,
+        echo=settings.DB_ECHO, # Full statement logging is for local debugging only
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args={"prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE},
+    )
+    event.listen(new_engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(new_engine.sync_engine, "after_cursor_execute", _make_after_cursor_execute(stats))
+    event.listen(new_engine.sync_engine, "handle_error", _handle_error)
+    stats.engine = new_engine
+    return new_engine
+
+pool_stats = PoolStats()
+engine = _create_engine(settings.SQLALCHEMY_DATABASE_URI, pool_stats)
 AsyncSessionLocal = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
 
+# --- Read Replica (optional) ---
+# Only configured when POSTGRES_REPLICA_SERVER is set; otherwise reads use the primary.
+replica_pool_stats: Optional[PoolStats] = None
+read_engine: Optional[AsyncEngine] = None
+ReadSessionLocal: Optional[async_sessionmaker] = None
+
+if settings.SQLALCHEMY_REPLICA_DATABASE_URI:
+    replica_pool_stats = PoolStats()
+    read_engine = _create_engine(settings.SQLALCHEMY_REPLICA_DATABASE_URI, replica_pool_stats)
+    ReadSessionLocal = async_sessionmaker(read_engine, expire_on_commit=False, class_=AsyncSession)
+
 class Base(DeclarativeBase):
     pass
 
+class ReplicaMonitor:
+    """
+    Decides whether the replica is fit to serve reads.
+    Lag is re-checked at most every REPLICA_LAG_CHECK_SECONDS; if the replica is
+    too far behind (or unreachable) reads fall back to the primary until it recovers.
+    """
+
+    # Zero when the replica has replayed everything it received (an idle primary
+    # would otherwise look "behind" because no new transactions arrive).
+    LAG_QUERY = text(
+        "SELECT CASE "
+        "WHEN NOT pg_is_in_recovery() THEN 0 "
+        "WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+        "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) "
+        "END"
+    )
+
+    def __init__(self):
+        self.lag_seconds: Optional[float] = None
+        self.healthy = False
+        self.fallbacks = 0
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def _check(self) -> None:
+        try:
+            async with read_engine.connect() as conn:
+                self.lag_seconds = float((await conn.execute(self.LAG_QUERY)).scalar_one())
+            self.healthy = self.lag_seconds <= settings.REPLICA_MAX_LAG_SECONDS
+        except Exception as e:
+            print(f"❌ Replica lag check failed: {e}")
+            self.lag_seconds = None
+            self.healthy = False
+        self._checked_at = time.monotonic()
+
+    async def is_usable(self) -> bool:
+        if time.monotonic() - self._checked_at >= settings.REPLICA_LAG_CHECK_SECONDS:
+            async with self._lock:
+                # Another request may have refreshed it while we waited
+                if time.monotonic() - self._checked_at >= settings.REPLICA_LAG_CHECK_SECONDS:
+                    await self._check()
+        if not self.healthy:
+            self.fallbacks += 1
+        return self.healthy
+
+    def snapshot(self) -> dict:
+        return {"healthy": self.healthy, "lag_seconds": self.lag_seconds, "fallbacks": self.fallbacks}
+
+replica_monitor = ReplicaMonitor()
+
 # Dependency to get DB session
 # 2. Update the return type hint to AsyncGenerator
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     async with AsyncSessionLocal() as session:
-        yield session
\ No newline at end of file
+        yield session
+
+async def read_session_factory(written_at: Optional[float] = None) -> async_sessionmaker:
+    """
+    Replica when configured and caught up, else primary. written_at (time.time()) is the
+    last write the caller must see: until the replica can have replayed it (lag is at
+    most REPLICA_MAX_LAG_SECONDS, checked every REPLICA_LAG_CHECK_SECONDS) the primary
+    is used instead.
+    """
+    if ReadSessionLocal is None:
+        return AsyncSessionLocal
+    if written_at and time.time() - written_at < settings.REPLICA_MAX_LAG_SECONDS + settings.REPLICA_LAG_CHECK_SECONDS:
+        return AsyncSessionLocal
+    if not await replica_monitor.is_usable():
+        return AsyncSessionLocal
+    return ReadSessionLocal
+
+# Dependency for read-only endpoints: replica when configured and caught up, else primary.
+# Never write through this session.
+async def get_read_db() -> AsyncGenerator[AsyncSession, None]:
+    session_factory = await read_session_factory()
+    async with session_factory() as session:
+        yield session
@@ -1,13 +1,22 @@
 # app/main.py
-from fastapi import FastAPI, Depends
+import asyncio
+from fastapi import FastAPI, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
 
 from app.config import get_settings
 from app.database import engine, Base, get_db
-from app.api.v1.endpoints import auth, users, products, carts, orders, payments, coupons, recommendations
+from app.core.security import shutdown_hash_pool
+from app.core.revocation import revocation_list
+from app.core.recommendations import neighbor_index
+from app.core.trending import trending
+from app.core.cart_store import cart_store
+from app.core.cart_sweeper import run_sweep_loop
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.core.query_stats import track_queries, warn_on_n_plus_one
+from app.api.v1.endpoints import auth, users, products, carts, orders, payments, coupons, recommendations, admin
 
 settings = get_settings()
 
@@ -17,13 +26,72 @@ async def lifespan(app: FastAPI):
     # 1. Startup Logic
     # Create Database Tables (includes the new 'carts' and 'orders' tables)
     async with engine.begin() as conn:
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm")) # Product name trigram index
         await conn.run_sync(Base.metadata.create_all)
     
+    # Revoked token versions (stateless-claims auth, and cross-worker invalidation of
+    # the user cache): load them, then keep them fresh
+    if settings.AUTH_STATELESS_TOKENS:
+        await revocation_list.refresh() # Must not accept revoked tokens, so fail hard here
+    else:
+        try:
+            await revocation_list.refresh()
+        except Exception as e:
+            print(f"❌ Revocation list: initial load failed, relying on the user cache TTL: {e}")
+    revocation_task = asyncio.create_task(revocation_list.run_refresh_loop())
+    
+    # Co-purchase recommendations: load the latest index, then watch for new builds.
+    # A failed first load must not stop the app: serve the empty snapshot, the loop retries
+    try:
+        await neighbor_index.refresh()
+    except Exception as e:
+        print(f"❌ Recommendations: initial load failed, starting empty: {e}")
+    recommendations_task = asyncio.create_task(neighbor_index.run_refresh_loop())
+    
+    # Trending: load the current rankings, then flush/reload periodically (same fallback)
+    try:
+        await trending.refresh()
+    except Exception as e:
+        print(f"❌ Trending: initial load failed, starting empty: {e}")
+    trending_task = asyncio.create_task(trending.run_refresh_loop())
+    
+    # Redis carts: write changed carts back to Postgres in the background
+    cart_persist_task = None
+    if settings.CART_BACKEND == "redis":
+        cart_persist_task = asyncio.create_task(cart_store.run_persist_loop())
+    
+    # Abandoned carts: delete expired rows in small batches
+    cart_sweep_task = None
+    if settings.CART_SWEEP_INTERVAL_SECONDS > 0:
+        cart_sweep_task = asyncio.create_task(run_sweep_loop())
+    
     # 2. Yield control
     yield
     
     # 3. Shutdown Logic
-    pass
+    revocation_task.cancel()
+    recommendations_task.cancel()
+    trending_task.cancel()
+    with suppress(asyncio.CancelledError):
+        await trending_task # A flush in flight puts its counts back before the final one
+    try:
+        await trending.flush() # Don't lose this worker's last counts
+    except Exception as e:
+        print(f"❌ Trending flush on shutdown failed: {e}")
+    if cart_sweep_task:
+        # Wait for the cancellation to land: a batch in flight is rolled back before we go on
+        cart_sweep_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await cart_sweep_task
+    if cart_persist_task:
+        cart_persist_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await cart_persist_task # Let a write-back in flight stop before the final one
+        try:
+            await cart_store.persist()
+        except Exception as e:
+            print(f"❌ Cart persistence on shutdown failed: {e}")
+    shutdown_hash_pool()
 # ----------------------------------
 
 # Initialize App
@@ -40,8 +108,19 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag", "Server-Timing", "X-DB-Query-Count"], # Readable by browser clients
 )
 
+# Per-request SQL counters: statements, DB time and rows
+@app.middleware("http")
+async def query_stats_middleware(request: Request, call_next):
+    with track_queries() as stats:
+        response = await call_next(request)
+    response.headers["Server-Timing"] = stats.server_timing()
+    response.headers["X-DB-Query-Count"] = str(stats.count)
+    warn_on_n_plus_one(stats, f"{request.method} {request.url.path}")
+    return response
+
 # Include Routers
 app.include_router(auth.router, prefix=settings.API_V1_STR + "/auth", tags=["Authentication"])
 app.include_router(users.router, prefix=settings.API_V1_STR + "/users", tags=["User Management"])
@@ -51,6 +130,7 @@ app.include_router(orders.router, prefix=settings.API_V1_STR + "/orders", tags=[
 app.include_router(payments.router, prefix=settings.API_V1_STR + "/payments", tags=["Payments"])
 app.include_router(coupons.router, prefix=settings.API_V1_STR + "/coupons", tags=["Coupons"])
 app.include_router(recommendations.router, prefix=settings.API_V1_STR + "/recommendations", tags=["Recommendations"])
+app.include_router(admin.router, prefix=settings.API_V1_STR + "/admin", tags=["Admin Telemetry"])
 
 @app.get("/health")
 async def health(db: AsyncSession = Depends(get_db)):
@@ -1,12 +1,18 @@
 # app/models/cart.py
 import uuid
-from sqlalchemy import String, ForeignKey, JSON
+from datetime import datetime
+from sqlalchemy import String, ForeignKey, JSON, DateTime, Index, func
 from sqlalchemy.orm import Mapped, mapped_column
 from app.database import Base
 
 class Cart(Base):
     __tablename__ = "carts"
+    __table_args__ = (
+        Index("ix_carts_updated_at", "updated_at"), # Abandoned-cart sweeper (app/core/cart_sweeper.py)
+    )
     
     id: Mapped[uuid.UUID] = mapped_column(primary_key=True, default=uuid.uuid4)
     session_id: Mapped[str] = mapped_column(String(255), unique=True, index=True) # Unique cart ID
-    items: Mapped[dict] = mapped_column(JSON, default=[]) # Stores the list: [{"variant_id": "...", "quantity": 1}]
\ No newline at end of file
+    items: Mapped[dict] = mapped_column(JSON, default=dict) # Keyed by variant: {"<variant_id>": quantity}
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
+    updated_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now(), onupdate=func.now())
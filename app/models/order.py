@@ -2,7 +2,7 @@
 import uuid
 import enum
 from decimal import Decimal
-from sqlalchemy import String, Numeric, Text, ForeignKey, Integer, Enum as SQLEnum, DateTime, func
+from sqlalchemy import String, Numeric, Text, ForeignKey, Integer, Index, Enum as SQLEnum, DateTime, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.database import Base
 
@@ -18,6 +18,11 @@ class OrderStatus(str, enum.Enum):
 
 class Order(Base):
     __tablename__ = "orders"
+    __table_args__ = (
+        # Keyset pagination, newest first: per user and across all orders
+        Index("ix_orders_user_id_created_at_id", "user_id", "created_at", "id"),
+        Index("ix_orders_created_at_id", "created_at", "id"),
+    )
     
     id: Mapped[uuid.UUID] = mapped_column(primary_key=True, default=uuid.uuid4)
     user_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("users.id"))
@@ -36,8 +41,8 @@ class OrderItem(Base):
     __tablename__ = "order_items"
     
     id: Mapped[uuid.UUID] = mapped_column(primary_key=True, default=uuid.uuid4)
-    order_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("orders.id"))
-    variant_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("product_variants.id"))
+    order_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("orders.id"), index=True) # selectinload(Order.items)
+    variant_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("product_variants.id"), index=True)
     quantity: Mapped[int] = mapped_column(Integer)
     
     # CRITICAL: Store price at time of purchase
@@ -1,7 +1,8 @@
 # app/models/product.py
 import uuid
 from decimal import Decimal
-from sqlalchemy import String, Numeric, Text, Integer, ForeignKey, JSON, Boolean
+from sqlalchemy import String, Numeric, Text, Integer, ForeignKey, Boolean, Index, Computed, text
+from sqlalchemy.dialects.postgresql import TSVECTOR, JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.database import Base
 
@@ -14,25 +15,58 @@ class Category(Base):
 
 class Product(Base):
     __tablename__ = "products"
+    __table_args__ = (
+        Index("ix_products_name_id", "name", "id"), # Keyset pagination on (name, id)
+        # Recommendations: active products in a category, in id order
+        Index("ix_products_active_category_id_id", "category_id", "id", postgresql_where=text("is_active")),
+        # Full-text search (ranked) and typo-tolerant name matching; needs the pg_trgm extension
+        Index("ix_products_search_vector", "search_vector", postgresql_using="gin"),
+        Index("ix_products_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+        # Listing sorted by price (keyset on (min_price, id)) and the in-stock listing
+        Index("ix_products_min_price_id", "min_price", "id"),
+        Index("ix_products_in_stock_name_id", "name", "id", postgresql_where=text("total_inventory > 0")),
+    )
     
     id: Mapped[uuid.UUID] = mapped_column(primary_key=True, default=uuid.uuid4)
+    sku: Mapped[str] = mapped_column(String(50), unique=True, index=True, nullable=True) # Parent/style SKU (bulk import key)
     name: Mapped[str] = mapped_column(String(255), index=True)
     description: Mapped[str] = mapped_column(Text, nullable=True)
-    category_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("categories.id"))
+    category_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("categories.id"), index=True)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
     
+    # Denormalized from the variants (see app/core/inventory.py); NULL prices = no variants
+    min_price: Mapped[Decimal] = mapped_column(Numeric(10, 2), nullable=True)
+    max_price: Mapped[Decimal] = mapped_column(Numeric(10, 2), nullable=True)
+    total_inventory: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    
+    # Maintained by Postgres on insert/update (generated column); deferred so
+    # normal product queries don't load it
+    search_vector: Mapped[str] = mapped_column(
+        TSVECTOR,
+        Computed(
+            "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(description, '')), 'B')",
+            persisted=True,
+        ),
+        deferred=True,
+    )
+    
     # Relationship
     variants: Mapped[list["ProductVariant"]] = relationship(back_populates="product", cascade="all, delete-orphan")
 
 class ProductVariant(Base):
     __tablename__ = "product_variants"
+    __table_args__ = (
+        # Attribute filters (attributes @> '{"color": "Red"}')
+        Index("ix_product_variants_attributes", "attributes", postgresql_using="gin", postgresql_ops={"attributes": "jsonb_path_ops"}),
+    )
     
     id: Mapped[uuid.UUID] = mapped_column(primary_key=True, default=uuid.uuid4)
-    product_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("products.id"))
+    product_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("products.id"), index=True) # selectinload(Product.variants)
     sku: Mapped[str] = mapped_column(String(50), unique=True, index=True)
     price: Mapped[Decimal] = mapped_column(Numeric(10, 2)) # Precision 10, scale 2
     inventory_count: Mapped[int] = mapped_column(Integer, default=0)
-    attributes: Mapped[dict] = mapped_column(JSON, default={}) # e.g., {"color": "Red", "size": "M"}
+    attributes: Mapped[dict] = mapped_column(JSONB, default={}) # e.g., {"color": "Red", "size": "M"}
     
     # Relationship
     product: Mapped["Product"] = relationship(back_populates="variants")
\ No newline at end of file
@@ -0,0 +1,26 @@
+# app/models/recommendation.py
+import uuid
+from datetime import datetime
+from sqlalchemy import Integer, Float, DateTime, func
+from sqlalchemy.orm import Mapped, mapped_column
+from app.database import Base
+
+# Written by build_recommendations.py, read into memory by app/core/recommendations.py.
+# Derived data that is rebuilt wholesale, so no foreign keys (keeps the bulk load cheap);
+# neighbors that no longer exist or are inactive are filtered out when served.
+
+class ProductNeighbor(Base):
+    __tablename__ = "product_neighbors"
+    
+    product_id: Mapped[uuid.UUID] = mapped_column(primary_key=True)
+    rank: Mapped[int] = mapped_column(Integer, primary_key=True) # 0 = most similar
+    neighbor_id: Mapped[uuid.UUID] = mapped_column()
+    score: Mapped[float] = mapped_column(Float) # Cosine similarity of the co-purchase vectors
+
+class RecommendationBuild(Base):
+    __tablename__ = "recommendation_builds"
+    
+    id: Mapped[int] = mapped_column(Integer, primary_key=True) # Increases with every build
+    built_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
+    product_count: Mapped[int] = mapped_column(Integer)
+    neighbor_count: Mapped[int] = mapped_column(Integer)
@@ -0,0 +1,17 @@
+# app/models/trending.py
+import uuid
+from datetime import datetime
+from sqlalchemy import Integer, DateTime, Index
+from sqlalchemy.orm import Mapped, mapped_column
+from app.database import Base
+
+class ProductSalesBucket(Base):
+    """Units sold per product per hour (see app/core/trending.py). Old buckets are pruned."""
+    __tablename__ = "product_sales_buckets"
+    __table_args__ = (
+        Index("ix_product_sales_buckets_bucket_start", "bucket_start"), # Window scan + pruning
+    )
+    
+    product_id: Mapped[uuid.UUID] = mapped_column(primary_key=True)
+    bucket_start: Mapped[datetime] = mapped_column(DateTime, primary_key=True) # UTC, truncated to the hour
+    quantity: Mapped[int] = mapped_column(Integer, default=0)
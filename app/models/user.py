@@ -1,7 +1,7 @@
 # app/models/user.py
 import enum
 import uuid
-from sqlalchemy import String, Boolean, Enum as SQLEnum
+from sqlalchemy import String, Boolean, Integer, Index, Enum as SQLEnum
 from sqlalchemy.orm import Mapped, mapped_column
 from app.database import Base
 
@@ -11,10 +11,15 @@ class UserRole(str, enum.Enum):
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        Index("ix_users_username_id", "username", "id"), # Keyset pagination on (username, id)
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(primary_key=True, default=uuid.uuid4)
     email: Mapped[str] = mapped_column(String(255), unique=True, index=True, nullable=False)
     username: Mapped[str] = mapped_column(String(100), unique=True, index=True, nullable=False)
     hashed_password: Mapped[str] = mapped_column(String(255), nullable=False)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
-    role: Mapped[UserRole] = mapped_column(SQLEnum(UserRole), default=UserRole.USER)
\ No newline at end of file
+    role: Mapped[UserRole] = mapped_column(SQLEnum(UserRole), default=UserRole.USER)
+    # Bumped on role change / deactivation so previously issued tokens stop working
+    token_version: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
@@ -6,8 +6,8 @@ settings = get_settings()
 
 # Initialize Redis Client
 redis_client = Redis(
-    host="localhost", 
-    port=6379, 
+    host=settings.REDIS_HOST, 
+    port=settings.REDIS_PORT, 
     decode_responses=True # automatically convert bytes to strings
 )
 
@@ -17,4 +17,4 @@ async def init_redis():
     print("✅ Redis connected")
 
 async def close_redis():
-    await redis_client.close()
\ No newline at end of file
+    await redis_client.close()
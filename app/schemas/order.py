@@ -1,6 +1,6 @@
 # app/schemas/order.py
-from pydantic import BaseModel, Field
-from typing import List, Optional
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Optional, Literal
 from uuid import UUID
 from decimal import Decimal
 from app.models.order import OrderStatus
@@ -16,6 +16,43 @@ class CartResponse(BaseModel):
     session_id: str
     items: List[CartItem] = []
 
+class CartOperation(BaseModel):
+    # add: increase by quantity; set: replace (0 removes the line); remove: drop the line
+    op: Literal["add", "set", "remove"]
+    variant_id: UUID
+    quantity: Optional[int] = Field(None, ge=0)
+
+    @model_validator(mode="after")
+    def check_quantity(self):
+        if self.op == "add" and not self.quantity:
+            raise ValueError("add needs a quantity greater than 0")
+        if self.op == "set" and self.quantity is None:
+            raise ValueError("set needs a quantity")
+        return self
+
+class CartBatchRequest(BaseModel):
+    operations: List[CartOperation] = Field(min_length=1, max_length=100) # Applied in order
+
+class CartPreviewLine(BaseModel):
+    variant_id: UUID
+    product_id: Optional[UUID] = None
+    sku: Optional[str] = None
+    quantity: int
+    unit_price: Optional[Decimal] = None
+    line_total: Decimal
+    available: int
+    warning: Optional[str] = None # Set when checkout would reject this line
+
+class CartPreviewResponse(BaseModel):
+    session_id: str
+    lines: List[CartPreviewLine] = []
+    subtotal: Decimal
+    discount: Decimal
+    total: Decimal
+    coupon_code: Optional[str] = None
+    coupon_error: Optional[str] = None
+    can_checkout: bool
+
 class OrderItemResponse(BaseModel):
     id: UUID
     variant_id: UUID
@@ -1,8 +1,9 @@
 # app/schemas/product.py
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 from typing import Optional, List, Dict
 from uuid import UUID
 from decimal import Decimal
+import json
 
 class CategoryBase(BaseModel):
     name: str
@@ -51,4 +52,36 @@ class ProductResponse(ProductBase):
     variants: List[ProductVariantResponse] = []
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+# --- Bulk Import ---
+class ProductImportRow(BaseModel):
+    # One row per variant; rows sharing product_sku belong to the same product
+    product_sku: str = Field(min_length=1, max_length=50)
+    name: str = Field(min_length=1, max_length=255)
+    description: Optional[str] = None
+    category_id: UUID
+    is_active: bool = True
+    sku: str = Field(min_length=1, max_length=50)
+    price: Decimal = Field(gt=0, max_digits=10, decimal_places=2)
+    inventory_count: int = Field(ge=0)
+    attributes: Dict[str, str] = {}
+
+    @field_validator("attributes", mode="before")
+    @classmethod
+    def parse_attributes(cls, value):
+        # CSV files carry attributes as a JSON object string
+        if isinstance(value, str):
+            return json.loads(value) if value.strip() else {}
+        return value
+
+class ImportRowError(BaseModel):
+    line: int
+    error: str
+
+class ImportReport(BaseModel):
+    rows: int = 0
+    imported: int = 0
+    failed: int = 0
+    errors: List[ImportRowError] = []
+    errors_truncated: bool = False
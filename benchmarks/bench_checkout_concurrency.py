@@ -0,0 +1,181 @@
+# benchmarks/bench_checkout_concurrency.py
+"""
+N parallel checkouts against one hot SKU.
+
+Every buyer's cart holds --qty units of the hot variant plus one unit of each of
+--shared-skus other variants (plenty of stock), in a random order per cart, so
+concurrent checkouts lock overlapping rows and would deadlock without a fixed
+lock order. Checkouts go through the real endpoint function, each with its own
+session, --concurrency at a time.
+
+Then the results are checked:
+  - no overselling: hot stock never below 0, and initial - final == units sold
+  - exactly min(buyers, stock // qty) checkouts succeed, the rest get the
+    "Insufficient stock" 400; anything else (e.g. a deadlock) is an error
+  - products.total_inventory still equals the sum of its variants
+
+Seed data is committed (the checkouts need to see it) and deleted at the end.
+
+Usage (needs the usual .env and migrations applied):
+    python -m benchmarks.bench_checkout_concurrency --buyers 500 --stock 200 --qty 1 --concurrency 20
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import sys
+import time
+import uuid
+
+from fastapi import HTTPException
+from sqlalchemy import text
+
+from app.api.v1.endpoints.orders import checkout
+from app.database import engine, AsyncSessionLocal
+from app.models.user import User
+from app.schemas.order import CheckoutRequest
+
+PREFIX = "bench_checkout_"
+
+async def seed(buyers: int, stock: int, qty: int, shared_skus: int) -> dict:
+    run_id = uuid.uuid4().hex[:8]
+    ids = {
+        "run": run_id,
+        "user": uuid.uuid4(),
+        "category": uuid.uuid4(),
+        "product": uuid.uuid4(),
+        "hot": uuid.uuid4(),
+        "shared": [uuid.uuid4() for _ in range(shared_skus)],
+    }
+    async with engine.begin() as conn:
+        await conn.execute(
+            text("INSERT INTO users (id, email, username, hashed_password, is_active, role, token_version) "
+                 "VALUES (:id, :email, :username, 'x', true, 'USER', 0)"),
+            {"id": ids["user"], "email": f"{PREFIX}{run_id}@example.com", "username": f"{PREFIX}{run_id}"},
+        )
+        await conn.execute(
+            text("INSERT INTO categories (id, name) VALUES (:id, :name)"),
+            {"id": ids["category"], "name": f"{PREFIX}{run_id}"},
+        )
+        await conn.execute(
+            text("INSERT INTO products (id, name, category_id, is_active) VALUES (:id, :name, :category_id, true)"),
+            {"id": ids["product"], "name": f"{PREFIX}{run_id}", "category_id": ids["category"]},
+        )
+        variants = [(ids["hot"], stock)] + [(v, buyers * 10) for v in ids["shared"]]
+        for n, (variant_id, inventory) in enumerate(variants):
+            await conn.execute(
+                text("INSERT INTO product_variants (id, product_id, sku, price, inventory_count, attributes) "
+                     "VALUES (:id, :product_id, :sku, 9.99, :inventory, '{}')"),
+                {"id": variant_id, "product_id": ids["product"], "sku": f"BENCH-CO-{run_id}-{n}", "inventory": inventory},
+            )
+        await conn.execute(
+            text("UPDATE products SET min_price = 9.99, max_price = 9.99, total_inventory = :total WHERE id = :id"),
+            {"id": ids["product"], "total": sum(inventory for _, inventory in variants)},
+        )
+
+        for buyer in range(buyers):
+            lines = [(str(ids["hot"]), qty)] + [(str(v), 1) for v in ids["shared"]]
+            random.shuffle(lines) # Different lock request order per cart
+            await conn.execute(
+                text("INSERT INTO carts (id, session_id, items) VALUES (gen_random_uuid(), :session_id, CAST(:items AS JSON))"),
+                {"session_id": f"{PREFIX}{run_id}_{buyer}", "items": json.dumps(dict(lines))},
+            )
+    return ids
+
+async def cleanup(ids: dict):
+    async with engine.begin() as conn:
+        await conn.execute(
+            text("DELETE FROM order_items WHERE order_id IN (SELECT id FROM orders WHERE user_id = :user_id)"),
+            {"user_id": ids["user"]},
+        )
+        await conn.execute(text("DELETE FROM orders WHERE user_id = :user_id"), {"user_id": ids["user"]})
+        await conn.execute(text("DELETE FROM carts WHERE session_id LIKE :pattern"), {"pattern": f"{PREFIX}{ids['run']}_%"})
+        await conn.execute(text("DELETE FROM product_variants WHERE product_id = :id"), {"id": ids["product"]})
+        await conn.execute(text("DELETE FROM products WHERE id = :id"), {"id": ids["product"]})
+        await conn.execute(text("DELETE FROM categories WHERE id = :id"), {"id": ids["category"]})
+        await conn.execute(text("DELETE FROM users WHERE id = :id"), {"id": ids["user"]})
+
+async def buy(session_id: str, user: User, semaphore: asyncio.Semaphore, latencies: list) -> str:
+    async with semaphore:
+        start = time.perf_counter()
+        try:
+            async with AsyncSessionLocal() as db:
+                await checkout(CheckoutRequest(session_id=session_id, shipping_address="1 Bench St"), db=db, current_user=user)
+            return "ok"
+        except HTTPException as e:
+            return "sold_out" if "Insufficient stock" in str(e.detail) else f"http_{e.status_code}: {e.detail}"
+        except Exception as e: # Deadlocks, serialization failures, pool timeouts...
+            return f"error: {type(e).__name__}: {e}"
+        finally:
+            latencies.append((time.perf_counter() - start) * 1000)
+
+async def run(buyers: int, stock: int, qty: int, shared_skus: int, concurrency: int) -> bool:
+    ids = await seed(buyers, stock, qty, shared_skus)
+    try:
+        user = User(id=ids["user"]) # checkout only reads the id
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies: list = []
+
+        started = time.perf_counter()
+        outcomes = await asyncio.gather(*(
+            buy(f"{PREFIX}{ids['run']}_{buyer}", user, semaphore, latencies) for buyer in range(buyers)
+        ))
+        elapsed = time.perf_counter() - started
+
+        async with engine.connect() as conn:
+            final_stock = (await conn.execute(
+                text("SELECT inventory_count FROM product_variants WHERE id = :id"), {"id": ids["hot"]}
+            )).scalar_one()
+            units_sold = (await conn.execute(
+                text("SELECT coalesce(sum(quantity), 0) FROM order_items WHERE variant_id = :id"), {"id": ids["hot"]}
+            )).scalar_one()
+            total_inventory, variant_sum = (await conn.execute(
+                text("SELECT p.total_inventory, (SELECT sum(inventory_count) FROM product_variants WHERE product_id = p.id) "
+                     "FROM products p WHERE p.id = :id"), {"id": ids["product"]}
+            )).one()
+    finally:
+        await cleanup(ids)
+    await engine.dispose()
+
+    succeeded = outcomes.count("ok")
+    sold_out = outcomes.count("sold_out")
+    errors = [o for o in outcomes if o not in ("ok", "sold_out")]
+    expected = min(buyers, stock // qty)
+
+    latencies.sort()
+    print({
+        "buyers": buyers,
+        "concurrency": concurrency,
+        "succeeded": succeeded,
+        "sold_out": sold_out,
+        "errors": len(errors),
+        "elapsed_s": round(elapsed, 3),
+        "checkouts_per_s": round(buyers / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies), 2),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1], 2),
+        "stock": {"initial": stock, "final": final_stock, "sold": units_sold},
+    })
+    for error in errors[:5]:
+        print("   ", error)
+
+    checks = {
+        "no overselling": final_stock >= 0 and stock - final_stock == units_sold == succeeded * qty,
+        f"{expected} checkouts succeeded": succeeded == expected,
+        "no errors": not errors,
+        "total_inventory matches variants": total_inventory == variant_sum,
+    }
+    for name, passed in checks.items():
+        print(f"{'✅' if passed else '❌'} {name}")
+    return all(checks.values())
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--buyers", type=int, default=500)
+    parser.add_argument("--stock", type=int, default=200, help="Units of the hot SKU")
+    parser.add_argument("--qty", type=int, default=1, help="Units of the hot SKU per cart")
+    parser.add_argument("--shared-skus", type=int, default=3, help="Other variants in every cart")
+    parser.add_argument("--concurrency", type=int, default=20, help="Keep within DB_POOL_SIZE + DB_MAX_OVERFLOW")
+    args = parser.parse_args()
+    ok = asyncio.run(run(args.buyers, args.stock, args.qty, args.shared_skus, args.concurrency))
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,125 @@
+# benchmarks/bench_list_serialization.py
+"""
+Compares the two ways of producing a GET /products/ page:
+
+  1. orm   - select(Product) + selectinload(variants), then ProductResponse
+             validation with from_attributes and Pydantic JSON (the old path)
+  2. fast  - product_rows_statement() rows with variants json_agg'd in SQL,
+             encoded by app.core.fast_json (orjson when installed)
+
+Seeds N products with V variants each inside a transaction (rolled back at the
+end), checks that both paths return the same JSON document, then times query +
+serialization separately for each path.
+
+Usage (needs the usual .env and migrations applied):
+    python -m benchmarks.bench_list_serialization --products 5000 --variants 4 --page 100 --rounds 200
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import List
+
+from pydantic import TypeAdapter
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.core import fast_json
+from app.core.catalog_cache import dump_json
+from app.core.fast_json import product_rows_statement, products_json
+from app.database import engine
+from app.models.product import Product
+from app.schemas.product import ProductResponse
+
+product_list_adapter = TypeAdapter(List[ProductResponse])
+
+def seed_sql(products: int, variants: int) -> list[str]:
+    return [
+        "INSERT INTO categories (id, name) VALUES (gen_random_uuid(), 'bench_serialize_cat')",
+        "INSERT INTO products (id, name, description, category_id, is_active) "
+        "SELECT gen_random_uuid(), 'bench_serialize_' || lpad(g::text, 8, '0'), 'Generated product ' || g, "
+        "(SELECT id FROM categories WHERE name = 'bench_serialize_cat'), true "
+        f"FROM generate_series(1, {products}) g",
+        "INSERT INTO product_variants (id, product_id, sku, price, inventory_count, attributes) "
+        "SELECT gen_random_uuid(), p.id, 'BENCH-SER-' || p.name || '-' || v, round((random() * 100 + 1)::numeric, 2), "
+        "(random() * 50)::int, jsonb_build_object('color', 'c' || v, 'size', 'M') "
+        f"FROM products p CROSS JOIN generate_series(1, {variants}) v WHERE p.name LIKE 'bench_serialize_%'",
+        "ANALYZE products, product_variants",
+    ]
+
+def normalized(body: bytes) -> list:
+    # selectinload doesn't order variants; the fast path orders them by id
+    products = json.loads(body)
+    for product in products:
+        product["variants"].sort(key=lambda v: v["id"])
+    return products
+
+def summary(timings: list) -> dict:
+    timings = sorted(timings)
+    return {
+        "p50_ms": round(statistics.median(timings), 3),
+        "p95_ms": round(timings[int(len(timings) * 0.95) - 1], 3),
+    }
+
+async def run(products: int, variants: int, page: int, rounds: int):
+    async with engine.connect() as conn:
+        trans = await conn.begin()
+        try:
+            for statement in seed_sql(products, variants):
+                await conn.exec_driver_sql(statement)
+            session = AsyncSession(bind=conn, expire_on_commit=False)
+
+            orm_stmt = (
+                select(Product).options(selectinload(Product.variants))
+                .filter(Product.name.like("bench_serialize_%"))
+                .order_by(Product.name, Product.id).limit(page)
+            )
+            fast_stmt = (
+                product_rows_statement()
+                .filter(Product.name.like("bench_serialize_%"))
+                .order_by(Product.name, Product.id).limit(page)
+            )
+
+            results = {"orm": {"query": [], "serialize": []}, "fast": {"query": [], "serialize": []}}
+            bodies = {}
+            for _ in range(rounds):
+                start = time.perf_counter()
+                objects = (await session.execute(orm_stmt)).scalars().all()
+                mid = time.perf_counter()
+                bodies["orm"] = dump_json(product_list_adapter, objects)
+                end = time.perf_counter()
+                results["orm"]["query"].append((mid - start) * 1000)
+                results["orm"]["serialize"].append((end - mid) * 1000)
+                session.expunge_all() # Every request starts with an empty identity map
+
+                start = time.perf_counter()
+                rows = (await session.execute(fast_stmt)).all()
+                mid = time.perf_counter()
+                bodies["fast"] = products_json(rows)
+                end = time.perf_counter()
+                results["fast"]["query"].append((mid - start) * 1000)
+                results["fast"]["serialize"].append((end - mid) * 1000)
+
+            if normalized(bodies["orm"]) != normalized(bodies["fast"]):
+                print("❌ Paths returned different documents")
+            else:
+                print("✅ Both paths return the same document")
+            print(f"Encoder: {'orjson' if fast_json.orjson is not None else 'json (stdlib)'}")
+            for name, parts in results.items():
+                total = [q + s for q, s in zip(parts["query"], parts["serialize"])]
+                print(name, {"query": summary(parts["query"]), "serialize": summary(parts["serialize"]), "total": summary(total)})
+            await session.close()
+        finally:
+            await trans.rollback()
+    await engine.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=5000)
+    parser.add_argument("--variants", type=int, default=4)
+    parser.add_argument("--page", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(run(args.products, args.variants, args.page, args.rounds))
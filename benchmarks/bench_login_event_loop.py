@@ -0,0 +1,78 @@
+# benchmarks/bench_login_event_loop.py
+"""
+Measures event-loop responsiveness while a burst of logins is being hashed.
+
+A "catalog" probe coroutine sleeps for 1 ms in a loop and records how late it
+wakes up. That lateness is exactly what every other endpoint on the worker
+experiences. We run the same login burst twice:
+
+  1. inline   - verify_password() called directly in async code (old behaviour)
+  2. pool     - verify_password_async() via the bounded hashing pool
+
+Usage (needs the usual .env so Settings can load):
+    python -m benchmarks.bench_login_event_loop --logins 40
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from fastapi import HTTPException
+
+from app.core.security import get_password_hash, verify_password, verify_password_async
+
+PROBE_INTERVAL = 0.001
+
+async def probe(stop: asyncio.Event, lags: list):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append((time.perf_counter() - start - PROBE_INTERVAL) * 1000)
+
+async def inline_login(password: str, hashed: str):
+    # Mimics the old handler: blocking bcrypt on the event loop
+    await asyncio.sleep(0)
+    return verify_password(password, hashed)
+
+async def pooled_login(password: str, hashed: str):
+    try:
+        return await verify_password_async(password, hashed)
+    except HTTPException:
+        return None # Shed with 503
+
+async def run(mode: str, logins: int, hashed: str) -> dict:
+    lags: list = []
+    stop = asyncio.Event()
+    probe_task = asyncio.create_task(probe(stop, lags))
+
+    login = inline_login if mode == "inline" else pooled_login
+    started = time.perf_counter()
+    results = await asyncio.gather(*(login("secret-password", hashed) for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await probe_task
+
+    lags.sort()
+    return {
+        "mode": mode,
+        "logins": logins,
+        "shed_503": sum(1 for r in results if r is None),
+        "wall_s": round(elapsed, 2),
+        "probe_samples": len(lags),
+        "lag_p50_ms": round(statistics.median(lags), 2) if lags else None,
+        "lag_p99_ms": round(lags[int(len(lags) * 0.99) - 1], 2) if lags else None,
+        "lag_max_ms": round(lags[-1], 2) if lags else None,
+    }
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=40)
+    args = parser.parse_args()
+
+    hashed = get_password_hash("secret-password")
+    for mode in ("inline", "pool"):
+        print(await run(mode, args.logins, hashed))
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,103 @@
+# benchmarks/bench_product_search.py
+"""
+Latency benchmark for GET /products/search on a large seeded catalog.
+
+Seeds N products (default 1,000,000) with generated names/descriptions and two
+variants each inside a transaction, ANALYZEs, then runs what the endpoint runs for
+a mix of exact, multi-word and misspelled queries: build_search_statement through
+an ORM session (including the selectinload(variants) follow-up) plus the
+ProductResponse serialization. The small vocabulary is deliberate: typical queries
+match tens of thousands of products, the worst case for ranking (capped by
+SEARCH_MAX_CANDIDATES). Everything is rolled back at the end. Target: p95 < 50 ms.
+
+Usage (needs the usual .env and migrations applied):
+    python -m benchmarks.bench_product_search --products 1000000 --queries 300
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.database import engine
+from app.api.v1.endpoints.products import build_search_statement, product_list_adapter
+from app.core.catalog_cache import dump_json
+
+WORDS = [
+    "red", "blue", "green", "black", "white", "cotton", "linen", "wool", "denim", "leather",
+    "shirt", "jacket", "trousers", "dress", "sneaker", "boot", "scarf", "hat", "backpack", "wallet",
+    "classic", "slim", "relaxed", "vintage", "premium", "sport", "summer", "winter", "organic", "waterproof",
+]
+
+QUERIES = [
+    "red shirt", "leather boot", "waterproof jacket", "organic cotton dress", "vintage denim",
+    "sneker", "jaket", "backpak", "wollet", "premum linen", # typos -> trigram path
+]
+
+def seed_sql(products: int) -> list[str]:
+    words = "ARRAY[" + ",".join(f"'{w}'" for w in WORDS) + "]"
+    pick = f"({words})[1 + floor(random() * {len(WORDS)})::int]"
+    return [
+        "INSERT INTO categories (id, name) SELECT gen_random_uuid(), 'bench_search_cat_' || g FROM generate_series(1, 100) g",
+        "CREATE TEMP TABLE bench_search_categories ON COMMIT DROP AS "
+        "SELECT id, row_number() OVER () AS n FROM categories WHERE name LIKE 'bench_search_cat_%'",
+        "INSERT INTO products (id, name, description, category_id, is_active) "
+        f"SELECT gen_random_uuid(), {pick} || ' ' || {pick} || ' ' || {pick} || ' ' || g, "
+        f"'A ' || {pick} || ' ' || {pick} || ' piece made from ' || {pick} || ' for everyday use', "
+        "(SELECT id FROM bench_search_categories WHERE n = 1 + g % 100), true "
+        f"FROM generate_series(1, {products}) g",
+        "INSERT INTO product_variants (id, product_id, sku, price, inventory_count, attributes) "
+        "SELECT gen_random_uuid(), p.id, 'BENCH-SEARCH-' || p.id || '-' || v, 19.99, 10, '{}' "
+        "FROM products p CROSS JOIN generate_series(1, 2) v "
+        "WHERE p.category_id IN (SELECT id FROM bench_search_categories)",
+        "ANALYZE products, product_variants",
+    ]
+
+async def run(products: int, queries: int):
+    async with engine.connect() as conn:
+        trans = await conn.begin()
+        try:
+            started = time.perf_counter()
+            for statement in seed_sql(products):
+                await conn.exec_driver_sql(statement)
+            print(f"Seeded {products} products in {time.perf_counter() - started:.1f}s")
+            
+            category_ids = (await conn.exec_driver_sql(
+                "SELECT id FROM categories WHERE name LIKE 'bench_search_cat_%' LIMIT 10"
+            )).scalars().all()
+            
+            session = AsyncSession(bind=conn)
+            timings = []
+            for i in range(queries):
+                q = random.choice(QUERIES)
+                category_id = random.choice(category_ids) if i % 3 == 0 else None
+                stmt = build_search_statement(q, category_id, None, 20)
+                # Same work as the endpoint on a cache miss: query + selectinload + JSON
+                start = time.perf_counter()
+                rows = (await session.execute(stmt)).all()
+                dump_json(product_list_adapter, [row.Product for row in rows[:20]])
+                timings.append((time.perf_counter() - start) * 1000)
+                session.expunge_all() # Every request starts with an empty identity map
+            await session.close()
+            
+            timings.sort()
+            print({
+                "queries": queries,
+                "max_candidates": get_settings().SEARCH_MAX_CANDIDATES,
+                "p50_ms": round(statistics.median(timings), 2),
+                "p95_ms": round(timings[int(len(timings) * 0.95) - 1], 2),
+                "max_ms": round(timings[-1], 2),
+            })
+        finally:
+            await trans.rollback()
+    await engine.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=300)
+    args = parser.parse_args()
+    asyncio.run(run(args.products, args.queries))
@@ -0,0 +1,131 @@
+# build_recommendations.py
+import argparse
+import asyncio
+import time
+from array import array
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import select, insert, text
+
+from app.config import get_settings
+from app.database import engine
+from app.models.order import Order, OrderItem
+from app.models.product import ProductVariant
+from app.models.recommendation import ProductNeighbor, RecommendationBuild
+
+# Item-to-item co-purchase index.
+# 1. Stream distinct (order, product) pairs from order_items joined to product_variants
+# 2. Build a sparse orders x products matrix X (1 = product was in the order)
+# 3. C = X^T X counts how often two products were bought together; dividing by
+#    sqrt(n_i * n_j) turns the counts into cosine similarity, so best-sellers don't
+#    become everyone's neighbor
+# 4. Keep the top K per product and replace product_neighbors in one transaction
+# All the math is vectorized (numpy / scipy.sparse), so millions of order lines take minutes.
+# Workers pick up the new build on their next refresh (app/core/recommendations.py).
+# Needs numpy and scipy (only this job does):  pip install numpy scipy
+# Run periodically, e.g. nightly:  python build_recommendations.py --days 365
+
+settings = get_settings()
+
+FETCH_BATCH_SIZE = 100_000
+
+async def load_baskets(conn, days: Optional[int]):
+    """Returns (order index per pair, product index per pair, product ids by index)."""
+    stmt = (
+        select(OrderItem.order_id, ProductVariant.product_id)
+        .join(ProductVariant, ProductVariant.id == OrderItem.variant_id)
+        .distinct()
+    )
+    if days:
+        stmt = stmt.join(Order, Order.id == OrderItem.order_id).filter(
+            Order.created_at >= datetime.now() - timedelta(days=days)
+        )
+
+    # UUIDs -> dense matrix indexes; the arrays keep millions of pairs compact
+    order_index: dict = {}
+    product_index: dict = {}
+    order_rows, product_cols = array("q"), array("q")
+    result = await conn.stream(stmt.execution_options(yield_per=FETCH_BATCH_SIZE))
+    async for partition in result.partitions():
+        for order_id, product_id in partition:
+            order_rows.append(order_index.setdefault(order_id, len(order_index)))
+            product_cols.append(product_index.setdefault(product_id, len(product_index)))
+    return order_rows, product_cols, list(product_index)
+
+def top_k_neighbors(order_rows, product_cols, n_products: int, k: int, min_co_purchases: int):
+    """Returns (product index, neighbor index, rank, score) arrays, best neighbor first."""
+    import numpy as np # Optional dependencies, only needed by this job
+    from scipy import sparse
+
+    rows = np.frombuffer(order_rows, dtype=np.int64)
+    cols = np.frombuffer(product_cols, dtype=np.int64)
+    n_orders = int(rows.max()) + 1 if len(rows) else 0
+    x = sparse.csr_matrix((np.ones(len(rows), dtype=np.float32), (rows, cols)), shape=(n_orders, n_products))
+
+    orders_per_product = np.asarray(x.sum(axis=0)).ravel()
+
+    # Co-purchase counts, without the diagonal (a product with itself)
+    co = (x.T @ x).tocsr()
+    co.setdiag(0)
+    co.data[co.data < min_co_purchases] = 0
+    co.eliminate_zeros()
+
+    # Cosine similarity: counts / sqrt(orders containing i * orders containing j)
+    inv_norm = 1.0 / np.sqrt(np.maximum(orders_per_product, 1))
+    sim = (sparse.diags(inv_norm) @ co @ sparse.diags(inv_norm)).tocsr()
+
+    # Top K per row without a Python loop: sort all entries by (row, -score), then
+    # rank = position - start of the row
+    row_ids = np.repeat(np.arange(n_products), np.diff(sim.indptr))
+    order = np.lexsort((-sim.data, row_ids))
+    ranks = np.arange(len(order)) - sim.indptr[row_ids[order]]
+    keep = order[ranks < k]
+    return row_ids[keep], sim.indices[keep], ranks[ranks < k], sim.data[keep]
+
+async def store(conn, product_ids: list, sources, targets, ranks, scores) -> int:
+    """Replace product_neighbors and record the build, in one transaction."""
+    records = [
+        (product_ids[s], int(r), product_ids[t], float(score))
+        for s, t, r, score in zip(sources.tolist(), targets.tolist(), ranks.tolist(), scores.tolist())
+    ]
+    async with conn.begin():
+        # DELETE rather than TRUNCATE: workers reloading right now keep reading the old build
+        await conn.execute(text(f"DELETE FROM {ProductNeighbor.__tablename__}"))
+        raw_connection = await conn.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(
+            ProductNeighbor.__tablename__,
+            columns=["product_id", "rank", "neighbor_id", "score"],
+            records=records,
+        )
+        result = await conn.execute(
+            insert(RecommendationBuild)
+            .values(product_count=len(set(sources.tolist())), neighbor_count=len(records))
+            .returning(RecommendationBuild.id)
+        )
+        return result.scalar_one()
+
+async def build(days: Optional[int], k: int, min_co_purchases: int):
+    started = time.perf_counter()
+    async with engine.connect() as conn:
+        order_rows, product_cols, product_ids = await load_baskets(conn, days)
+        await conn.rollback() # End the read transaction before the long computation
+        print(f"Loaded {len(order_rows)} order/product pairs ({len(product_ids)} products) in {time.perf_counter() - started:.1f}s")
+
+        step = time.perf_counter()
+        sources, targets, ranks, scores = top_k_neighbors(order_rows, product_cols, len(product_ids), k, min_co_purchases)
+        print(f"Computed {len(sources)} neighbors in {time.perf_counter() - step:.1f}s")
+
+        step = time.perf_counter()
+        build_id = await store(conn, product_ids, sources, targets, ranks, scores)
+        print(f"Stored build {build_id} in {time.perf_counter() - step:.1f}s")
+    await engine.dispose()
+    print(f"✅ Recommendation index built in {time.perf_counter() - started:.1f}s")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the co-purchase recommendation index.")
+    parser.add_argument("--days", type=int, default=None, help="Only use orders from the last N days")
+    parser.add_argument("--top-k", type=int, default=settings.RECOMMENDATIONS_TOP_K)
+    parser.add_argument("--min-co-purchases", type=int, default=settings.RECOMMENDATIONS_MIN_CO_PURCHASES)
+    args = parser.parse_args()
+    asyncio.run(build(args.days, args.top_k, args.min_co_purchases))
@@ -0,0 +1,99 @@
+# check_query_counts.py
+import asyncio
+import json
+import sys
+import uuid
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.query_stats import assert_max_queries
+from app.core.security import create_access_token
+from app.database import engine, get_db, get_read_db
+from app.main import app
+
+# Query-count regression check for checkout.
+# Checks out a 1-item cart and an N-item cart through the real app (in-process
+# client, so the request middleware and dependencies all run) and fails (exit 1)
+# if checkout goes over its query budget or if its query count grows with the
+# cart size (an N+1 creeping back in). Everything runs inside one transaction
+# that is rolled back at the end (endpoint commits become savepoints), so it is
+# safe to point at a dev database. Needs httpx:  pip install httpx
+# Run after migrate.py:  python check_query_counts.py
+
+MAX_CHECKOUT_QUERIES = 15
+LARGE_CART_ITEMS = 25
+
+SEED_SQL = [
+    "INSERT INTO users (id, email, username, hashed_password, is_active, role, token_version) "
+    "VALUES (:user_id, 'query_count_check@example.com', 'query_count_check', 'x', true, 'USER', 0)",
+    "INSERT INTO categories (id, name) VALUES (:category_id, 'query_count_check_cat')",
+    "INSERT INTO products (id, name, category_id, is_active, min_price, max_price, total_inventory) "
+    f"VALUES (:product_id, 'query_count_check_product', :category_id, true, 9.99, 9.99, {LARGE_CART_ITEMS * 100})",
+    "INSERT INTO product_variants (id, product_id, sku, price, inventory_count, attributes) "
+    "SELECT gen_random_uuid(), :product_id, 'QCOUNT-' || g, 9.99, 100, '{}' "
+    f"FROM generate_series(1, {LARGE_CART_ITEMS}) g",
+]
+
+async def check_counts() -> bool:
+    import httpx # Optional dependency, only needed by this check
+
+    ids = {"user_id": uuid.uuid4(), "category_id": uuid.uuid4(), "product_id": uuid.uuid4()}
+    ok = True
+    async with engine.connect() as conn:
+        trans = await conn.begin()
+        try:
+            for statement in SEED_SQL:
+                await conn.execute(text(statement), ids)
+            variant_ids = (await conn.execute(
+                text("SELECT id FROM product_variants WHERE product_id = :product_id ORDER BY sku"), ids
+            )).scalars().all()
+
+            # Warm-up, 1 item and N items (the warm-up fills per-process caches such as the user cache)
+            carts = {"warmup": variant_ids[:1], "1 item": variant_ids[:1], f"{LARGE_CART_ITEMS} items": variant_ids}
+            for name, cart_variants in carts.items():
+                await conn.execute(
+                    text("INSERT INTO carts (id, session_id, items) VALUES (gen_random_uuid(), :session_id, CAST(:items AS JSON))"),
+                    {"session_id": f"query_count_check_{name}", "items": json.dumps({str(v): 1 for v in cart_variants})},
+                )
+
+            # All requests share the outer transaction; their commits release savepoints
+            async def override_db():
+                async with AsyncSession(bind=conn, expire_on_commit=False, join_transaction_mode="create_savepoint") as session:
+                    yield session
+            app.dependency_overrides[get_db] = override_db
+            app.dependency_overrides[get_read_db] = override_db
+
+            headers = {"Authorization": f"Bearer {create_access_token(ids['user_id'])}"}
+            counts = {}
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://check") as client:
+                for name in carts:
+                    try:
+                        with assert_max_queries(MAX_CHECKOUT_QUERIES) as stats:
+                            response = await client.post(
+                                "/api/v1/orders/checkout", headers=headers,
+                                json={"session_id": f"query_count_check_{name}", "shipping_address": "x"},
+                            )
+                    except AssertionError as e:
+                        print(f"❌ checkout ({name}): {e}")
+                        ok = False
+                        continue
+                    if response.status_code != 201:
+                        print(f"❌ checkout ({name}) returned {response.status_code}: {response.text}")
+                        ok = False
+                        continue
+                    counts[name] = stats.count
+                    print(f"✅ checkout ({name}): {stats.count} queries")
+
+            small, large = counts.get("1 item"), counts.get(f"{LARGE_CART_ITEMS} items")
+            if small is not None and large is not None and large != small:
+                print(f"❌ checkout query count grows with the cart: {small} -> {large}")
+                ok = False
+        finally:
+            app.dependency_overrides.clear()
+            await trans.rollback()
+    await engine.dispose()
+    return ok
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(check_counts()) else 1)
@@ -0,0 +1,135 @@
+# check_query_plans.py
+import asyncio
+import json
+import sys
+from sqlalchemy import select, text, tuple_
+from app.database import engine
+from app.api.v1.endpoints.orders import orders_page_statement
+from app.api.v1.endpoints.products import ProductFilters, build_list_statement, build_search_statement
+from app.api.v1.endpoints.recommendations import neighbor_rows_statement, category_candidates_statement
+from app.core.fast_json import order_rows_statement
+from app.core.pagination import encode_cursor
+from app.models.order import Order, OrderItem
+from app.models.product import Product, ProductVariant
+from app.models.user import User
+
+# EXPLAIN-based regression check for the hot query paths.
+# Seeds a realistic dataset inside a transaction, ANALYZEs it, EXPLAINs each hot
+# query and fails (exit 1) if any of them falls back to a sequential scan on a
+# watched table. Everything is rolled back at the end, so it is safe to point at
+# a dev database. Run after migrate.py:  python check_query_plans.py
+
+WATCHED_TABLES = {"orders", "order_items", "products", "product_variants", "users", "categories"}
+
+SEED_SQL = [
+    "INSERT INTO categories (id, name) "
+    "SELECT gen_random_uuid(), 'plan_check_cat_' || g FROM generate_series(1, 200) g",
+    "INSERT INTO products (id, name, category_id, is_active) "
+    "SELECT gen_random_uuid(), 'plan_check_product_' || g, "
+    "(SELECT id FROM categories WHERE name = 'plan_check_cat_' || (g % 200 + 1)), g % 10 <> 0 "
+    "FROM generate_series(1, 20000) g",
+    "INSERT INTO product_variants (id, product_id, sku, price, inventory_count, attributes) "
+    "SELECT gen_random_uuid(), p.id, 'PLANCHK-' || row_number() OVER () || '-' || v, 9.99, 10, '{}' "
+    "FROM products p CROSS JOIN generate_series(1, 3) v WHERE p.name LIKE 'plan_check_product_%'",
+    "INSERT INTO users (id, email, username, hashed_password, is_active, role, token_version) "
+    "SELECT gen_random_uuid(), 'plan_check_' || g || '@example.com', 'plan_check_user_' || g, 'x', true, 'USER', 0 "
+    "FROM generate_series(1, 5000) g",
+    "INSERT INTO orders (id, user_id, total_amount, status, shipping_address, created_at) "
+    "SELECT gen_random_uuid(), u.id, 19.98, 'PAID', 'x', now() - (g || ' minutes')::interval "
+    "FROM users u CROSS JOIN generate_series(1, 10) g WHERE u.username LIKE 'plan_check_user_%'",
+    "INSERT INTO order_items (id, order_id, variant_id, quantity, unit_price) "
+    "SELECT gen_random_uuid(), o.id, "
+    "(SELECT id FROM product_variants WHERE sku LIKE 'PLANCHK-%' OFFSET (abs(hashtext(o.id::text)) % 1000) LIMIT 1), 2, 9.99 "
+    "FROM orders o JOIN users u ON u.id = o.user_id WHERE u.username LIKE 'plan_check_user_%'",
+    "UPDATE products p SET min_price = 9.99, max_price = 9.99, total_inventory = 30 "
+    "WHERE p.name LIKE 'plan_check_product_%'",
+    "ANALYZE categories, products, product_variants, users, orders, order_items",
+]
+
+def compile_sql(stmt) -> str:
+    # The engine's own (asyncpg) dialect: no pyformat escaping, so operators like % stay intact
+    return str(stmt.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+
+def hot_queries(sample: dict) -> dict:
+    """
+    The statements the endpoints actually issue, built with the endpoints' own
+    statement builders (plus the selectinload follow-ups that are still in use).
+    """
+    name_cursor = encode_cursor(sample["product_name"], sample["product_id"])
+    price_cursor = encode_cursor(sample["product_min_price"], sample["product_id"])
+    return {
+        "orders.list_my_orders": orders_page_statement(
+            order_rows_statement().filter(Order.user_id == sample["user_id"]),
+            encode_cursor(sample["order_created_at"].isoformat(), sample["order_id"]), 20,
+        ),
+        "orders.list_all_orders": orders_page_statement(order_rows_statement(), None, 50),
+        "orders.checkout selectinload(Order.items)": select(OrderItem)
+            .filter(OrderItem.order_id.in_(sample["order_ids"])),
+        "products.list_products": build_list_statement(plan_filters(), "name", name_cursor, 100)[0],
+        "products.list_products sort=price_asc": build_list_statement(plan_filters(), "price_asc", price_cursor, 100)[0],
+        "products.list_products in_stock": build_list_statement(plan_filters(in_stock=True), "name", name_cursor, 100)[0],
+        "products.search_products": build_search_statement("waterproof jacket", None, None, 20),
+        "products.search_products category": build_search_statement("waterproof jacket", sample["category_id"], None, 20),
+        "products search selectinload(Product.variants)": select(ProductVariant)
+            .filter(ProductVariant.product_id.in_(sample["product_ids"])),
+        "recommendations neighbors": neighbor_rows_statement(sample["product_ids"][:20]),
+        "recommendations category candidates": category_candidates_statement([sample["category_id"]]),
+        "users.list_users": select(User)
+            .filter(tuple_(User.username, User.id) > tuple_(sample["username"], sample["user_id"]))
+            .order_by(User.username, User.id).limit(101),
+    }
+
+def plan_filters(in_stock: bool = False) -> ProductFilters:
+    # Explicit values: the defaults are FastAPI Query() markers
+    return ProductFilters(category_id=None, attr=[], min_price=None, max_price=None, in_stock=in_stock)
+
+def find_seq_scans(plan: dict) -> list[str]:
+    found = []
+    if plan.get("Node Type") == "Seq Scan" and plan.get("Relation Name") in WATCHED_TABLES:
+        found.append(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        found.extend(find_seq_scans(child))
+    return found
+
+async def check_plans() -> bool:
+    ok = True
+    async with engine.connect() as conn:
+        trans = await conn.begin()
+        try:
+            print("Seeding plan-check dataset (rolled back afterwards) ...")
+            for statement in SEED_SQL:
+                await conn.exec_driver_sql(statement)
+            
+            row = (await conn.execute(text(
+                "SELECT o.id, o.created_at, o.user_id, u.username FROM orders o JOIN users u ON u.id = o.user_id "
+                "WHERE u.username LIKE 'plan_check_user_%' ORDER BY o.created_at DESC LIMIT 1"
+            ))).one()
+            product = (await conn.execute(text(
+                "SELECT id, name, category_id, min_price FROM products WHERE name LIKE 'plan_check_product_%' ORDER BY name LIMIT 1"
+            ))).one()
+            sample = {
+                "order_id": row.id, "order_created_at": row.created_at, "user_id": row.user_id, "username": row.username,
+                "order_ids": (await conn.execute(text("SELECT id FROM orders LIMIT 20"))).scalars().all(),
+                "product_id": product.id, "product_name": product.name, "category_id": product.category_id,
+                "product_min_price": product.min_price,
+                "product_ids": (await conn.execute(text("SELECT id FROM products LIMIT 100"))).scalars().all(),
+            }
+            
+            for name, stmt in hot_queries(sample).items():
+                result = await conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + compile_sql(stmt))
+                plan = result.scalar_one()
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                seq_scans = find_seq_scans(plan[0]["Plan"])
+                if seq_scans:
+                    ok = False
+                    print(f"❌ {name}: sequential scan on {', '.join(seq_scans)}")
+                else:
+                    print(f"✅ {name}")
+        finally:
+            await trans.rollback()
+    await engine.dispose()
+    return ok
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(check_plans()) else 1)
@@ -0,0 +1,79 @@
+# migrate.py
+import asyncio
+import re
+from pathlib import Path
+from sqlalchemy import text
+from app.database import engine
+
+# Versioned schema migrations.
+# Base.metadata.create_all (run on startup) only creates missing tables; it never
+# alters existing ones. Every schema change to an existing table ships as a numbered
+# .sql file in migrations/ and is applied once, in order, by this script.
+# Statements run in autocommit mode so CREATE INDEX CONCURRENTLY works and large
+# tables are not locked while indexes build. Keep statements idempotent (IF NOT EXISTS).
+# A failed CREATE INDEX CONCURRENTLY leaves an INVALID index behind that IF NOT EXISTS
+# would happily skip on the next run, so those are dropped and rebuilt, and every
+# concurrently built index is checked for validity afterwards.
+
+MIGRATIONS_DIR = Path(__file__).parent / "migrations"
+
+CONCURRENT_INDEX_RE = re.compile(
+    r"^CREATE\s+(?:UNIQUE\s+)?INDEX\s+CONCURRENTLY\s+(?:IF\s+NOT\s+EXISTS\s+)?([\w.\"]+)",
+    re.IGNORECASE,
+)
+
+INDEX_VALID_SQL = text("SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)")
+
+def split_statements(sql: str) -> list[str]:
+    lines = [line for line in sql.splitlines() if not line.strip().startswith("--")]
+    return [stmt.strip() for stmt in "\n".join(lines).split(";") if stmt.strip()]
+
+async def index_valid(conn, name: str):
+    """True / False for an existing index, None if there is no such index."""
+    return (await conn.execute(INDEX_VALID_SQL, {"name": name})).scalar_one_or_none()
+
+async def run_statement(conn, statement: str):
+    match = CONCURRENT_INDEX_RE.match(statement)
+    if not match:
+        await conn.exec_driver_sql(statement)
+        return
+    
+    name = match.group(1)
+    # 1. Leftover from an earlier failed build: IF NOT EXISTS would skip it
+    if await index_valid(conn, name) is False:
+        print(f"   Rebuilding invalid index {name}")
+        await conn.exec_driver_sql(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+    
+    # 2. Build, then make sure the result is usable
+    await conn.exec_driver_sql(statement)
+    if not await index_valid(conn, name):
+        raise RuntimeError(f"Index {name} is missing or INVALID after {statement!r}")
+
+async def migrate():
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS schema_migrations ("
+            "version VARCHAR(255) PRIMARY KEY, applied_at TIMESTAMP NOT NULL DEFAULT now())"
+        ))
+        result = await conn.execute(text("SELECT version FROM schema_migrations"))
+        applied = set(result.scalars().all())
+        
+        pending = [p for p in sorted(MIGRATIONS_DIR.glob("*.sql")) if p.stem not in applied]
+        if not pending:
+            print("Database is up to date.")
+            return
+        
+        for path in pending:
+            print(f"Applying {path.stem} ...")
+            for statement in split_statements(path.read_text()):
+                await run_statement(conn, statement)
+            await conn.execute(
+                text("INSERT INTO schema_migrations (version) VALUES (:version)"),
+                {"version": path.stem},
+            )
+        print(f"Applied {len(pending)} migration(s).")
+    await engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(migrate())
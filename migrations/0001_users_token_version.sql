@@ -0,0 +1,2 @@
+-- 0001: per-user token version for stateless-claims auth (user-003)
+ALTER TABLE users ADD COLUMN IF NOT EXISTS token_version INTEGER NOT NULL DEFAULT 0;
@@ -0,0 +1,7 @@
+-- 0002: composite indexes matching the keyset pagination sort keys
+-- The orders indexes also serve plain filters on orders.user_id and orders.created_at
+-- (leading column), so no separate single-column indexes are needed there.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_products_name_id ON products (name, id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_users_username_id ON users (username, id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_orders_user_id_created_at_id ON orders (user_id, created_at, id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_orders_created_at_id ON orders (created_at, id);
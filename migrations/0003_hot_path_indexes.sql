@@ -0,0 +1,11 @@
+-- 0003: foreign-key / join columns on the hot read paths
+-- selectinload(Order.items)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_order_items_order_id ON order_items (order_id);
+-- Reverse lookups from a variant (co-purchase, FK checks on variant delete)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_order_items_variant_id ON order_items (variant_id);
+-- selectinload(Product.variants)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_product_variants_product_id ON product_variants (product_id);
+-- Category filters / FK checks on category delete
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_products_category_id ON products (category_id);
+-- get_recommendations: active products in a category, id order
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_products_active_category_id_id ON products (category_id, id) WHERE is_active;
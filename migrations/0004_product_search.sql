@@ -0,0 +1,9 @@
+-- 0004: full-text + trigram product search
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+-- Adding a STORED generated column rewrites the table: run in a quiet window
+ALTER TABLE products ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('english', coalesce(name, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce(description, '')), 'B')
+) STORED;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_products_search_vector ON products USING gin (search_vector);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_products_name_trgm ON products USING gin (name gin_trgm_ops);
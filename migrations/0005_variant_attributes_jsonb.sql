@@ -0,0 +1,4 @@
+-- 0005: variant attributes as JSONB with a GIN index for server-side filtering/facets
+-- The type change rewrites product_variants: run in a quiet window
+ALTER TABLE product_variants ALTER COLUMN attributes TYPE jsonb USING attributes::jsonb;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_product_variants_attributes ON product_variants USING gin (attributes jsonb_path_ops);
@@ -0,0 +1,3 @@
+-- 0006: parent/style SKU on products, the upsert key for bulk catalog imports
+ALTER TABLE products ADD COLUMN IF NOT EXISTS sku VARCHAR(50);
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS ix_products_sku ON products (sku);
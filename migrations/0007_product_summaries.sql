@@ -0,0 +1,15 @@
+-- 0007: denormalized price/stock summary per product (sort by price, in-stock listing)
+ALTER TABLE products ADD COLUMN IF NOT EXISTS min_price NUMERIC(10, 2);
+ALTER TABLE products ADD COLUMN IF NOT EXISTS max_price NUMERIC(10, 2);
+ALTER TABLE products ADD COLUMN IF NOT EXISTS total_inventory INTEGER NOT NULL DEFAULT 0;
+-- Backfill from the variants
+UPDATE products p
+SET min_price = s.min_price, max_price = s.max_price, total_inventory = s.total_inventory
+FROM (
+    SELECT product_id, min(price) AS min_price, max(price) AS max_price, sum(inventory_count) AS total_inventory
+    FROM product_variants
+    GROUP BY product_id
+) s
+WHERE p.id = s.product_id;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_products_min_price_id ON products (min_price, id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_products_in_stock_name_id ON products (name, id) WHERE total_inventory > 0;
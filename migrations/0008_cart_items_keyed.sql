@@ -0,0 +1,12 @@
+-- 0008: cart items keyed by variant id ({"<variant_id>": quantity}) instead of a list of lines
+-- Duplicate lines for the same variant are summed. The app reads both formats, so this can run while serving.
+UPDATE carts
+SET items = coalesce((
+    SELECT jsonb_object_agg(line.variant_id, line.quantity)
+    FROM (
+        SELECT e->>'variant_id' AS variant_id, sum((e->>'quantity')::int) AS quantity
+        FROM json_array_elements(carts.items) e
+        GROUP BY 1
+    ) line
+), '{}'::jsonb)::json
+WHERE json_typeof(items) = 'array';
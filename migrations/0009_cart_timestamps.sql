@@ -0,0 +1,5 @@
+-- 0009: cart timestamps for the abandoned-cart sweeper
+-- now() is evaluated once, so existing carts start their TTL from the migration (no table rewrite)
+ALTER TABLE carts ADD COLUMN IF NOT EXISTS created_at TIMESTAMP NOT NULL DEFAULT now();
+ALTER TABLE carts ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP NOT NULL DEFAULT now();
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_carts_updated_at ON carts (updated_at);
@@ -0,0 +1,21 @@
+# sweep_carts.py
+import asyncio
+from app.config import get_settings
+from app.core.cart_sweeper import sweep_carts
+from app.database import engine
+
+# Deletes abandoned carts in small batches (see app/core/cart_sweeper.py).
+# Safe to run from cron alongside the app:  python sweep_carts.py
+
+async def main():
+    settings = get_settings()
+    print(
+        f"Sweeping carts idle for {settings.CART_ABANDONED_DAYS} days "
+        f"(empty: {settings.CART_EMPTY_TTL_HOURS} hours) ..."
+    )
+    deleted = await sweep_carts()
+    print(f"Deleted {deleted} cart(s).")
+    await engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main())